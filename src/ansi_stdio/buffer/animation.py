@@ -1,7 +1,9 @@
 from bisect import bisect_right
+from typing import Iterable, Optional
 
 from ansi_stdio.buffer.buffer import Buffer
-from ansi_stdio.buffer.frame import DeltaFrame, Frame
+from ansi_stdio.buffer.frame import DeltaFrame, Frame, KeyFrame
+from ansi_stdio.core.cache import Cache
 from ansi_stdio.core.versioned import Versioned, changes, waits
 
 
@@ -10,48 +12,267 @@ class Animation(Versioned):
     An animation that we can render somewhere.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        keyframe_every: int = 0,
+        keyframe_cells: int = 0,
+        cache_entries: int = 64,
+        cache_cells: int = 0,
+        source: Optional[Iterable[Frame]] = None,
+    ):
+        """
+        Args:
+            keyframe_every: Promote a DeltaFrame to a KeyFrame when this many
+                frames have passed since the last one. 0 to disable.
+            keyframe_cells: Promote a DeltaFrame to a KeyFrame when the deltas
+                since the last one have changed this many cells. 0 to disable.
+            cache_entries: Most rendered buffers to cache. 0 for no limit.
+            cache_cells: Most cells to hold across all cached buffers.
+                0 for no limit.
+            source: Frames to add lazily, as playback reaches them, so a
+                long recording can start before it's all been read.
+        """
         super().__init__()
+        self.keyframe_every = keyframe_every
+        self.keyframe_cells = keyframe_cells
         self._frames: list[Frame] = []
-        self._cache: dict[tuple, Buffer] = {}
+        self._times: list[float] = []  # start times, valid up to its length
+        self._keyframes: list[int] = []  # indexes of the non-delta frames
+        self._delta_cells = 0  # cells changed since the last keyframe
+        self.cache = Cache(max_entries=cache_entries, max_size=cache_cells)
+        self._source = iter(source) if source is not None else None
 
     @property
     def frames(self) -> list[Frame]:
+        """
+        The frames added so far. See `load` for a lazy source.
+        """
         return self._frames
 
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether every frame from the source has been added.
+        """
+        return self._source is None
+
+    @changes
+    def load(self, t: Optional[float] = None):
+        """
+        Add frames from the source.
+
+        Args:
+            t: Stop once a frame starts after this time. None for all of them.
+        """
+        source = self._source
+        while source is not None:
+            if t is not None and self._frames and self._timeline()[-1] > t:
+                return
+            frame = next(source, None)
+            if frame is None:
+                self._source = source = None
+            else:
+                self.add(frame)
+
     @changes
-    def add(self, frame: Frame):
+    def add(self, frame: Frame) -> Frame:
+        """
+        Append a frame to the animation.
+
+        Returns:
+            The frame that was added, which is a new KeyFrame if the delta
+            was promoted.
+        """
+        if isinstance(frame, DeltaFrame):
+            if self._should_promote(frame):
+                frame = self._promote(frame)
+            elif self.keyframe_cells:
+                self._delta_cells += len(frame.buffer)
+
+        if not isinstance(frame, DeltaFrame):
+            self._keyframes.append(len(self._frames))
+            self._delta_cells = 0
+
         if self._frames:
             frame.parent = self._frames[-1]
+        frame._animation = self
+        frame._index = len(self._frames)
         self._frames.append(frame)
 
-    @waits
-    def render(self, t: float) -> Buffer:
+        return frame
+
+    def _should_promote(self, frame: DeltaFrame) -> bool:
+        """
+        Check whether adding this delta would exceed the keyframe limits.
+        """
         if not self._frames:
-            return Buffer()
+            return False
+
+        if self.keyframe_every:
+            last = self._keyframes[-1] if self._keyframes else -1
+            if len(self._frames) - last >= self.keyframe_every:
+                return True
+
+        if self.keyframe_cells:
+            if self._delta_cells + len(frame.buffer) >= self.keyframe_cells:
+                return True
+
+        return False
+
+    def _promote(self, frame: DeltaFrame) -> KeyFrame:
+        """
+        Turn a delta into a keyframe, by applying it to the previous frame.
+        """
+        buffer = self._replay(len(self._frames) - 1)
+        buffer += frame.buffer
+        return KeyFrame(buffer, frame.duration)
+
+    def _retime(self, index: int):
+        """
+        Called by frames when the start times from `index` onwards changed.
+        """
+        del self._times[index:]
+
+    def _timeline(self) -> list[float]:
+        """
+        Get the frame start times, filling in any that were invalidated.
+        """
+        times = self._times
+        for i in range(len(times), len(self._frames)):
+            times.append(self._frames[i].time)
+        return times
+
+    def find(self, t: float) -> int:
+        """
+        Find the index of the frame showing at time t.
+
+        Returns:
+            The frame index, or -1 if t is before the first frame
+        """
+        if self._source is not None:
+            self.load(t)
+        return bisect_right(self._timeline(), t) - 1
+
+    def keyframe(self, index: int) -> int:
+        """
+        Find the index of the nearest keyframe at or before a frame.
+
+        Returns:
+            The keyframe's index, or 0 if there's no keyframe before it
+        """
+        pos = bisect_right(self._keyframes, index) - 1
+        return self._keyframes[pos] if pos >= 0 else 0
 
-        times = [f.time for f in self._frames]
-        index = bisect_right(times, t) - 1
+    def _replay(self, index: int) -> Buffer:
+        """
+        Build the buffer for a frame, starting from the keyframe before it.
+        """
+        start = self.keyframe(index)
+        first = self._frames[start]
+
+        if isinstance(first, DeltaFrame):
+            buffer = type(first.buffer)()
+            buffer += first.buffer
+        else:
+            buffer = first.buffer.copy()
+
+        for i in range(start + 1, index + 1):
+            buffer += self._frames[i].buffer
+
+        return buffer
+
+    @waits
+    def render(self, t: float) -> Buffer:
+        index = self.find(t)
         if index < 0:
             return Buffer()
 
-        key = []
-        buffer = None
+        start = self.keyframe(index)
+        cache_key = tuple(self._frames[i].cache_key for i in range(start, index + 1))
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached.copy()
 
-        for frame in self._frames[index:]:
-            if frame.time > t:
-                break
+        buffer = self._replay(index)
+        self.cache.put(cache_key, buffer.copy())
+        return buffer
 
-            key.append(frame.cache_key)
+    def cursor(self) -> "Cursor":
+        """
+        Get a playback cursor for rendering this animation in order.
+        """
+        return Cursor(self)
 
-            if not isinstance(frame, DeltaFrame):
-                buffer = frame.buffer.copy()
-            else:
-                buffer += frame.buffer
 
-        cache_key = tuple(key)
-        if cache_key in self._cache:
-            return self._cache[cache_key].copy()
+class Cursor:
+    """
+    Plays an animation forwards, remembering the last frame it rendered so
+    each step only applies the deltas in between.
 
-        self._cache[cache_key] = buffer.copy()
-        return buffer
+    Seeking backwards, past a keyframe, or after the current frame has been
+    changed falls back to a replay from the nearest keyframe.
+    """
+
+    def __init__(self, animation: Animation):
+        self.animation = animation
+        self.index = -1
+        self._buffer: Buffer = None
+        self._key = None  # cache_key of the frame at self.index
+
+    def reset(self):
+        """
+        Forget the current position.
+        """
+        self.index = -1
+        self._buffer = None
+        self._key = None
+
+    def render(self, t: float) -> Buffer:
+        """
+        Render the animation at time t.
+
+        Returns:
+            A copy of the buffer, safe to modify
+        """
+        animation = self.animation
+        with animation._lock:
+            index = animation.find(t)
+            if index < 0:
+                self.reset()
+                return Buffer()
+
+            if index != self.index or not self._valid():
+                self._seek(index)
+
+            return self._buffer.copy()
+
+    def _valid(self) -> bool:
+        """
+        Check the frame we're sitting on hasn't been changed under us.
+        """
+        frames = self.animation.frames
+        return (
+            self._buffer is not None
+            and self.index < len(frames)
+            and frames[self.index].cache_key == self._key
+        )
+
+    def _seek(self, index: int):
+        """
+        Move to a frame, applying deltas forward when we can.
+        """
+        animation = self.animation
+        frames = animation.frames
+
+        if (
+            not self._valid()
+            or index < self.index
+            or animation.keyframe(index) > self.index
+        ):
+            self._buffer = animation._replay(index)
+        else:
+            for i in range(self.index + 1, index + 1):
+                self._buffer += frames[i].buffer
+
+        self.index = index
+        self._key = frames[index].cache_key
@@ -1,21 +1,50 @@
 from rich.segment import Segment
 
 from ..core.box import Box
-from ..core.versioned import Versioned, changes
+from ..core.versioned import Versioned, changes, waits
+from .styles import styles
+
+CHAR_BITS = 21  # enough for any unicode code point
+CHAR_MASK = (1 << CHAR_BITS) - 1
+
+
+def pack(char: str, style_id: int) -> int:
+    """
+    Pack a character and a style id into a single int cell.
+    """
+    return (style_id << CHAR_BITS) | ord(char)
+
+
+def unpack(cell: int) -> Segment:
+    """
+    Turn a packed cell back into a Segment.
+    """
+    return Segment(chr(cell & CHAR_MASK), styles[cell >> CHAR_BITS])
 
 
 class Buffer(Versioned):
     """
     A 2D sparse grid of rich.Segment objects.
+
+    Cells are stored as ints that pack the character and its interned style
+    id, so comparing cells never has to compare Style objects.
     """
 
-    def __init__(self):
+    styles = styles
+    row_type = dict
+
+    def __init__(self, threadsafe: bool = True):
         """
         Initialize the buffer as a sparse structure.
+
+        Args:
+            threadsafe: Lock around writes. Pass False for a buffer that only
+                one thread touches, to take the locking out of write loops.
         """
-        super().__init__()
-        self._data = {}  # {y: {x: segment}}
-        self.box = Box()
+        super().__init__(threadsafe)
+        self._data = {}  # {y: {x: cell}}
+        self._shared = set()  # rows that copies might also be holding
+        self._box = Box()  # None when it needs working out again
         self._size = 0
 
     def __getitem__(self, coords):
@@ -28,10 +57,9 @@ class Buffer(Versioned):
         Returns:
             The Segment at those coordinates or None if empty
         """
-        x, y = coords
-        return self._data.get(y, {}).get(x)
+        cell = self._cell(*coords)
+        return None if cell is None else unpack(cell)
 
-    @changes
     def __setitem__(self, coords, segment):
         """
         Set a segment at the given coordinates.
@@ -44,27 +72,30 @@ class Buffer(Versioned):
         self.set(x, y, segment)
 
     @changes
-    def __iadd__(self, other) -> "Buffer":
-        """
-        Merge another buffer into this one.
+    def __delitem__(self, coords):
         """
-        if not isinstance(other, Buffer):
-            raise TypeError(f"Cannot merge {type(other)} with Buffer")
-
-        # Update box in one operation
-        self.box += other.box
+        Clear the cell at the given coordinates, if it's set.
 
-        # Merge the data from the other buffer
-        for y, row in other._data.items():
-            if y not in self._data:
-                # Fast path: copy entire row if it doesn't exist in current buffer
-                self._data[y] = row.copy()
-            else:
-                # Update existing row
-                self._data[y].update(row)
+        Args:
+            coords: A tuple of (x, y) coordinates
+        """
+        x, y = coords
+        if self._cell(x, y) is None:
+            return
 
-        self.recalculate(box=False)
+        row = self._writable(y)
+        del row[x]
+        self._size -= 1
+        self._box = None
+        if not row:
+            del self._data[y]
+            self._shared.discard(y)
 
+    def __iadd__(self, other) -> "Buffer":
+        """
+        Merge another buffer into this one.
+        """
+        self.blit(other)
         return self
 
     def __add__(self, other) -> "Buffer":
@@ -80,38 +111,78 @@ class Buffer(Versioned):
         Crop the buffer to the given box.
         Returns a newly allocated buffer.
         """
-        result = Buffer()
-        for y in range(box.min_y, box.max_y):
-            row = self._data.get(y)
-            if not row:
-                continue
-            for x in range(box.min_x, box.max_x):
-                if x in row:
-                    result.set(x, y, row[x])
+        result = type(self)(self.threadsafe)
+        width = box.max_x - box.min_x
+        for y in self._rows_between(box.min_y, box.max_y):
+            row = self._data[y]
+            if len(row) <= width:
+                cropped = {
+                    x: cell for x, cell in row.items() if box.min_x <= x < box.max_x
+                }
+            else:
+                cropped = {x: row[x] for x in range(box.min_x, box.max_x) if x in row}
+            if cropped:
+                result._data[y] = cropped
+                result._size += len(cropped)
+
+        result._box = None  # worked out when it's needed
         return result
 
     @changes
     def __iand__(self, box: Box) -> "Buffer":
         """
         Crop the buffer to the given box.
-        This modifies the buffer in place.
+        This modifies the buffer in place, trimming rows rather than
+        building new ones.
         """
-        self._data = (self & box)._data
-        self.box = box
-        self.recalculate(box=False)
+        for y in list(self._data):
+            row = self._data[y]
+            if box.min_y <= y < box.max_y:
+                outside = [x for x in row if not box.min_x <= x < box.max_x]
+            else:
+                outside = row
+            if not outside:
+                continue
+
+            self._size -= len(outside)
+            self._box = None
+            if len(outside) == len(row):
+                del self._data[y]
+                self._shared.discard(y)
+            elif y in self._shared:
+                # Keep just the inside rather than copying the lot
+                self._data[y] = {
+                    x: cell for x, cell in row.items() if box.min_x <= x < box.max_x
+                }
+                self._shared.discard(y)
+            else:
+                for x in outside:
+                    del row[x]
 
         return self
 
+    def _rows_between(self, min_y: int, max_y: int) -> list:
+        """
+        Get the ys of the rows from min_y to max_y (exclusive), going
+        through whichever of the rows and the range is shorter.
+        """
+        if max_y - min_y < len(self._data):
+            return [y for y in range(min_y, max_y) if y in self._data]
+        return [y for y in self._data if min_y <= y < max_y]
+
     def __sub__(self, other: "Buffer") -> "Buffer":
         """
         Create a new buffer representing the difference: self - other.
         Only includes cells in self that differ from other.
         """
-        delta = Buffer()
+        delta = type(self)(self.threadsafe)
         for y, row in self._data.items():
-            for x, seg in row.items():
-                if seg != other[x, y]:
-                    delta.set(x, y, seg)
+            changed = {x: cell for x, cell in row.items() if cell != other._cell(x, y)}
+            if changed:
+                delta._data[y] = changed
+                delta._size += len(changed)
+
+        delta._box = None
         return delta
 
     @changes
@@ -122,13 +193,20 @@ class Buffer(Versioned):
         """
         for y in list(self._data.keys()):
             row = self._data[y]
-            for x in list(row.keys()):
-                if self[x, y] == other[x, y]:
-                    del row[x]
-            if not row:
+            same = [x for x, cell in row.items() if cell == other._cell(x, y)]
+            if not same:
+                continue
+
+            self._size -= len(same)
+            self._box = None
+            if len(same) == len(row):
                 del self._data[y]
+                self._shared.discard(y)
+            else:
+                row = self._writable(y)
+                for x in same:
+                    del row[x]
 
-        self.recalculate()
         return self
 
     def __len__(self):
@@ -137,55 +215,244 @@ class Buffer(Versioned):
         """
         return self._size
 
-    @changes
+    @property
+    def box(self) -> Box:
+        """
+        The bounding box of the set cells.
+
+        Writes grow it as they go. Removing cells just marks it as stale,
+        and it's worked out from the rows the next time it's needed.
+        """
+        if self._box is None:
+            self._box = self._bounds()
+        return self._box
+
+    @box.setter
+    def box(self, value: Box):
+        self._box = value
+
+    def _bounds(self) -> Box:
+        """
+        Work out the bounding box from the rows.
+        """
+        rows = self._data
+        if not rows:
+            return Box()
+        return Box(
+            min(min(row) for row in rows.values()),
+            min(rows),
+            max(max(row) for row in rows.values()) + 1,
+            max(rows) + 1,
+        )
+
     def set(self, x, y, segment):
         """
         Set cell(s) starting at given coordinates with a Segment.
-        Handles multi-character segments by writing each character in sequence.
 
         Args:
             x: Starting X coordinate
             y: Y coordinate
             segment: Rich Segment object to place at this position
         """
+        self.set_row(x, y, segment.text, segment.style)
+
+    @changes
+    def set_row(self, x, y, text: str, style=None):
+        """
+        Write a string along a row in one style, as a single update.
+
+        Args:
+            x: Starting X coordinate
+            y: Y coordinate
+            text: Characters to write, one per cell
+            style: Style for all of them
+        """
+        count = len(text)
+        if not count:
+            return
 
-        self.box.update(x, y)
-        txtlen = len(segment.text)
-        if txtlen > 1:
-            self.box.update(x - 1 + txtlen, y)
+        # A stale box gets worked out from the rows, new cells included
+        if self._box is not None:
+            self._box.update(x, y)
+            self._box.update(x + count - 1, y)
 
-        # Ensure y entry exists before loop
-        if not self._data.get(y):
-            self._data[y] = {}
+        row = self._writable(y)
+        base = self.styles.intern(style) << CHAR_BITS
+        before = len(row)
+        row.update(zip(range(x, x + count), [base | code for code in map(ord, text)]))
+        self._size += len(row) - before
 
-        # Handle multi-character segments by writing each char
-        style = segment.style
-        for i, char in enumerate(segment.text):
-            if x + i not in self._data[y]:
-                self._size += 1
-            # Store a new single-character segment
-            self._data[y][x + i] = Segment(char, style)
+    @changes
+    def blit(self, other: "Buffer", x: int = 0, y: int = 0):
+        """
+        Copy another buffer's cells into this one, offset by x and y.
+
+        Args:
+            other: Buffer to copy from
+            x: Columns to move the cells right by
+            y: Rows to move the cells down by
+        """
+        if not isinstance(other, Buffer):
+            raise TypeError(f"Cannot merge {type(other)} with Buffer")
 
+        # Onto itself, we'd be reading rows as we wrote them
+        if other is self:
+            other = other.copy()
+
+        # Different storage, so go cell by cell
+        if type(other) is not type(self):
+            for cell_x, cell_y, segment in other.cells():
+                self.set_row(cell_x + x, cell_y + y, segment.text, segment.style)
+            return
+
+        if self._box is not None and other.box:
+            box = other.box
+            self._box += Box(box.min_x + x, box.min_y + y, box.max_x + x, box.max_y + y)
+
+        for src_y, src in other._data.items():
+            dst_y = src_y + y
+            row = src if not x else {src_x + x: cell for src_x, cell in src.items()}
+            if dst_y not in self._data:
+                # Nothing to merge with, so take a copy of the whole row
+                self._data[dst_y] = row.copy() if row is src else row
+                self._size += len(row)
+            else:
+                dst = self._writable(dst_y)
+                before = len(dst)
+                dst.update(row)
+                self._size += len(dst) - before
+
+    @changes
+    def fill(self, box: Box, char: str = " ", style=None):
+        """
+        Fill a box with one character in one style.
+
+        Args:
+            box: Area to fill
+            char: Character for every cell
+            style: Style for every cell
+        """
+        if not len(box):
+            return
+
+        if self._box is not None:
+            self._box += box
+        cell = pack(char, self.styles.intern(style))
+        columns = range(box.min_x, box.max_x)
+        for y in range(box.min_y, box.max_y):
+            row = self._writable(y)
+            before = len(row)
+            row.update(dict.fromkeys(columns, cell))
+            self._size += len(row) - before
+
+    def cells(self):
+        """
+        Iterate over every cell that is set.
+
+        Yields:
+            (x, y, segment) tuples
+        """
+        for y, row in self._data.items():
+            for x, cell in row.items():
+                yield x, y, unpack(cell)
+
+    def _cell(self, x, y):
+        """
+        Get the packed cell at the given coordinates, or None if empty.
+        """
+        row = self._data.get(y)
+        return None if row is None else row.get(x)
+
+    def _writable(self, y):
+        """
+        Get a row that's safe to write to, creating it if it doesn't exist
+        and un-sharing it if a copy might be holding it.
+        """
+        row = self._data.get(y)
+        if row is None:
+            row = self._data[y] = self.row_type()
+        elif y in self._shared:
+            row = self._data[y] = row.copy()
+            self._shared.discard(y)
+        return row
+
+    @waits
     def copy(self):
         """
-        Create a deep copy of this buffer.
+        Create a copy of this buffer.
+
+        This is copy-on-write: both buffers share their rows, and a row is
+        only duplicated when one of them writes to it.
 
         Returns:
             A new Buffer instance with the same content
         """
-        new_buffer = Buffer()
+        new_buffer = type(self)(self.threadsafe)
 
-        # Copy the box
-        new_buffer.box = Box(
-            self.box.min_x, self.box.min_y, self.box.max_x, self.box.max_y
-        )
+        # Copy the box, unless it's stale
+        box = self._box
+        if box is not None:
+            box = Box(box.min_x, box.min_y, box.max_x, box.max_y)
+        new_buffer._box = box
 
-        # Copy the data structure
-        for y, row in self._data.items():
-            new_buffer._data[y] = row.copy()
+        # Share the rows
+        new_buffer._data = dict(self._data)
+        new_buffer._shared = set(self._data)
+        self._shared = set(self._data)
+        new_buffer._size = self._size
 
         return new_buffer
 
+    @waits
+    def __getstate__(self):
+        """
+        Pickle with a style table of our own, since style ids only mean
+        something in the process that interned them.
+        """
+        local = {}  # {global id: local id}
+        rows = {y: self._pickle_row(row, local) for y, row in self._data.items()}
+        box = self.box
+        return {
+            "rows": rows,
+            "styles": [self.styles[style_id] for style_id in local],
+            "box": (box.min_x, box.min_y, box.max_x, box.max_y),
+            "size": self._size,
+            "threadsafe": self.threadsafe,
+        }
+
+    def __setstate__(self, state):
+        """
+        Unpickle, interning the pickled styles into this process's table.
+        """
+        self.__init__(state.get("threadsafe", True))
+        ids = [self.styles.intern(style) for style in state["styles"]]
+        self._data = {
+            y: self._unpickle_row(row, ids) for y, row in state["rows"].items()
+        }
+        self.box = Box(*state["box"])
+        self._size = state["size"]
+
+    @staticmethod
+    def _pickle_row(row, local):
+        """
+        Swap a row's style ids for local ones, adding any new ones to `local`.
+        """
+        result = {}
+        for x, cell in row.items():
+            style_id = local.setdefault(cell >> CHAR_BITS, len(local))
+            result[x] = (style_id << CHAR_BITS) | (cell & CHAR_MASK)
+        return result
+
+    @staticmethod
+    def _unpickle_row(row, ids):
+        """
+        Swap a pickled row's local style ids for global ones.
+        """
+        return {
+            x: (ids[cell >> CHAR_BITS] << CHAR_BITS) | (cell & CHAR_MASK)
+            for x, cell in row.items()
+        }
+
     @changes
     def recalculate(self, size: bool = True, box: bool = True):
         """
@@ -195,7 +462,4 @@ class Buffer(Versioned):
             self._size = sum(len(row) for row in self._data.values())
 
         if box:
-            self.box.reset()
-            for y, row in self._data.items():
-                for x in row:
-                    self.box.update(x, y)
+            self._box = self._bounds()
@@ -0,0 +1,500 @@
+"""
+A compact binary file format for animations.
+
+A file is a header, then a record per frame, each compressed on its own,
+with records of new styles written just before the first frame that uses
+them. Closing the file adds an index of where each frame starts and the
+whole style table, so a reader can map the file and decode any frame
+without touching the rest. A file that was never closed, such as a
+recording that got cut short, is read by walking the records instead.
+
+All numbers are little-endian. Cells are stored as spans of consecutive
+set cells: parallel arrays of code points and style ids.
+"""
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from rich.style import Style
+
+from ..core.box import Box
+from .animation import Animation
+from .buffer import CHAR_BITS, CHAR_MASK, Buffer
+from .dense import DenseBuffer, Row, _runs
+from .frame import DeltaFrame, Frame, KeyFrame
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"ANSIANIM"
+INDEX_MAGIC = b"ANSIINDX"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHH")  # magic, version, flags
+RECORD = struct.Struct("<BBxxdII")  # kind, codec, duration, size, stored size
+SPAN = struct.Struct("<iiI")  # y, start, length
+TRAILER = struct.Struct("<Q8s")  # index offset, index magic
+
+# Record kinds
+DELTA = 0
+KEY = 1
+STYLES = 2
+
+CODECS = {"none": 0, "zlib": 1, "zstd": 2}
+
+# Buffer types, as stored in a frame record
+BUFFER_TYPES = [Buffer, DenseBuffer]
+
+
+def _compress(data: bytes, codec: int) -> bytes:
+    if codec == CODECS["zlib"]:
+        return zlib.compress(data)
+    if codec == CODECS["zstd"]:
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def _decompress(data: bytes, codec: int) -> bytes:
+    if codec == CODECS["zlib"]:
+        return zlib.decompress(data)
+    if codec == CODECS["zstd"]:
+        if zstandard is None:
+            raise ValueError("This file needs the zstandard package to read")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return bytes(data)
+
+
+def _little(values: array) -> bytes:
+    """
+    Get an array's bytes in little-endian order.
+    """
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _native(data: bytes) -> array:
+    """
+    Read a little-endian array of unsigned ints.
+    """
+    values = array("I", data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _encode_styles(styles: list) -> bytes:
+    """
+    Encode styles as text, which rich can parse back.
+    """
+    out = [struct.pack("<I", len(styles))]
+    for style in styles:
+        if isinstance(style, Style):
+            kind, text = b"S", str(style)
+        elif isinstance(style, str):
+            kind, text = b"s", style
+        else:
+            raise TypeError(f"Can't store a style of type {type(style)}")
+        data = text.encode("utf-8")
+        out.append(kind + struct.pack("<I", len(data)) + data)
+    return b"".join(out)
+
+
+def _decode_styles(data: bytes, offset: int = 0) -> tuple[list, int]:
+    """
+    Decode styles written by _encode_styles.
+
+    Returns:
+        The styles, and the offset just past them
+    """
+    (count,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    styles = []
+    for _ in range(count):
+        is_style = data[offset] == ord("S")
+        (size,) = struct.unpack_from("<I", data, offset + 1)
+        offset += 5
+        end = offset + size
+        text = bytes(data[offset:end]).decode("utf-8")
+        offset = end
+        styles.append(Style.parse(text) if is_style else text)
+    return styles, offset
+
+
+def _spans(buffer: Buffer):
+    """
+    Get the runs of set cells in a buffer.
+
+    Yields:
+        (y, start, chars, styles) with global style ids
+    """
+    if isinstance(buffer, DenseBuffer):
+        for y, row in buffer._data.items():
+            for i, j in _runs(row.chars):
+                yield y, row.start + i, row.chars[i:j], row.styles[i:j]
+        return
+
+    for y, row in buffer._data.items():
+        xs = sorted(row)
+        i = 0
+        while i < len(xs):
+            j = i + 1
+            while j < len(xs) and xs[j] == xs[j - 1] + 1:
+                j += 1
+            cells = [row[x] for x in xs[i:j]]
+            chars = array("I", [cell & CHAR_MASK for cell in cells])
+            styles = array("I", [cell >> CHAR_BITS for cell in cells])
+            yield y, xs[i], chars, styles
+            i = j
+
+
+def _decode_buffer(data: bytes, ids: list[int]) -> Buffer:
+    """
+    Rebuild a buffer from a frame record's payload.
+
+    Args:
+        data: The decompressed payload
+        ids: Global style id for each of the file's style ids
+    """
+    buffer_type, count = struct.unpack_from("<BI", data)
+    buffer = BUFFER_TYPES[buffer_type]()
+    dense = buffer_type == 1
+    rows = buffer._data
+    box = None
+    size = 0
+    offset = 5
+
+    for _ in range(count):
+        y, start, length = SPAN.unpack_from(data, offset)
+        offset += SPAN.size
+        middle = offset + 4 * length
+        end = middle + 4 * length
+        chars = _native(data[offset:middle])
+        styles = array("I", [ids[style_id] for style_id in _native(data[middle:end])])
+        offset = end
+
+        if dense:
+            row = rows.get(y)
+            if row is None:
+                rows[y] = Row(start, chars, styles)
+            else:
+                row.cover(start, start + length)
+                i = start - row.start
+                j = i + length
+                row.chars[i:j] = chars
+                row.styles[i:j] = styles
+        else:
+            row = rows.setdefault(y, {})
+            for x, char, style_id in zip(range(start, start + length), chars, styles):
+                row[x] = (style_id << CHAR_BITS) | char
+
+        span = Box(start, y, start + length, y + 1)
+        box = span if box is None else box + span
+        size += length
+
+    if box is not None:
+        buffer.box = box
+    buffer._size = size
+    return buffer
+
+
+class AnimationWriter:
+    """
+    Writes animation frames to a file as they're made.
+
+    Each frame is held back until the next one arrives or the writer is
+    closed, so a Recorder can still set its duration.
+    """
+
+    def __init__(self, path, codec: str = "zlib", append: bool = False):
+        """
+        Args:
+            path: File to write
+            codec: How to compress each frame: "zlib", "zstd" or "none"
+            append: Add to the frames already in the file, rather than
+                starting a new one
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("The zstd codec needs the zstandard package")
+
+        self.path = Path(path)
+        self.codec = CODECS[codec]
+        self._offsets: list[int] = []  # where each frame record starts
+        self._file_ids = {0: 0}  # {global style id: file style id}
+        self._styles = []  # styles in file id order, from file id 1
+        self._pending: Optional[Frame] = None
+
+        if append and self.path.exists() and self.path.stat().st_size:
+            self._reopen()
+        else:
+            self._file = open(self.path, "wb")
+            self._file.write(HEADER.pack(MAGIC, VERSION, 0))
+
+    def _reopen(self):
+        """
+        Carry on writing an existing file, dropping its index.
+        """
+        with AnimationFile(self.path) as existing:
+            self._offsets = list(existing.offsets)
+            self._styles = list(existing.styles)
+            for file_id, style_id in enumerate(existing.ids):
+                self._file_ids.setdefault(style_id, file_id)
+            end = existing.end
+
+        self._file = open(self.path, "r+b")
+        self._file.truncate(end)
+        self._file.seek(end)
+
+    def __enter__(self) -> "AnimationWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, frame: Frame):
+        """
+        Queue a frame to be written, writing the one before it.
+        """
+        if self._pending is not None:
+            self._write_frame(self._pending)
+        self._pending = frame
+
+    def flush(self):
+        """
+        Write any queued frame and push everything to the file.
+        """
+        if self._pending is not None:
+            self._write_frame(self._pending)
+            self._pending = None
+        self._file.flush()
+
+    def close(self):
+        """
+        Write any queued frame and the index, then close the file.
+        """
+        if self._file.closed:
+            return
+
+        self.flush()
+        index_offset = self._file.tell()
+        self._file.write(struct.pack("<I", len(self._offsets)))
+        self._file.write(struct.pack(f"<{len(self._offsets)}Q", *self._offsets))
+        self._file.write(_encode_styles(self._styles))
+        self._file.write(TRAILER.pack(index_offset, INDEX_MAGIC))
+        self._file.close()
+
+    def _write_record(self, kind: int, duration: float, data: bytes):
+        stored = _compress(data, self.codec)
+        self._file.write(
+            RECORD.pack(kind, self.codec, duration, len(data), len(stored))
+        )
+        self._file.write(stored)
+
+    def _write_frame(self, frame: Frame):
+        buffer = frame.buffer
+        spans = list(_spans(buffer))
+
+        # Give any styles we haven't seen a file id, and write them first
+        file_ids = self._file_ids
+        new = []
+        for _, _, _, styles in spans:
+            for style_id in set(styles):
+                if style_id not in file_ids:
+                    file_ids[style_id] = len(file_ids)
+                    new.append(buffer.styles[style_id])
+        if new:
+            self._styles.extend(new)
+            self._write_record(STYLES, 0.0, _encode_styles(new))
+
+        out = [struct.pack("<BI", BUFFER_TYPES.index(type(buffer)), len(spans))]
+        for y, start, chars, styles in spans:
+            out.append(SPAN.pack(y, start, len(chars)))
+            out.append(_little(chars))
+            out.append(_little(array("I", map(file_ids.__getitem__, styles))))
+
+        self._offsets.append(self._file.tell())
+        kind = DELTA if isinstance(frame, DeltaFrame) else KEY
+        self._write_record(kind, frame.duration, b"".join(out))
+
+
+class AnimationFile:
+    """
+    Reads frames from a memory-mapped animation file, in any order.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: File to read
+        """
+        with open(path, "rb") as file:
+            try:
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Empty animation file: {path}")
+
+        magic, version, _ = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"Not an animation file: {path}")
+        if version > VERSION:
+            raise ValueError(f"Animation file version {version} is too new")
+
+        if not self._read_index():
+            self._scan()
+        self.ids = [0] + [Buffer.styles.intern(style) for style in self.styles]
+        self._kinds = [self.data[offset] for offset in self.offsets]
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __enter__(self) -> "AnimationFile":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    @property
+    def keyframes(self) -> list[int]:
+        """
+        The indexes of the keyframes.
+        """
+        return [i for i, kind in enumerate(self._kinds) if kind == KEY]
+
+    def _read_index(self) -> bool:
+        """
+        Read the index from the end of the file.
+
+        Returns:
+            False if there isn't one
+        """
+        data = self.data
+        if len(data) < HEADER.size + TRAILER.size:
+            return False
+        index_offset, magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+        if magic != INDEX_MAGIC:
+            return False
+
+        (count,) = struct.unpack_from("<I", data, index_offset)
+        self.offsets = list(struct.unpack_from(f"<{count}Q", data, index_offset + 4))
+        self.styles, _ = _decode_styles(data, index_offset + 4 + 8 * count)
+        self.end = index_offset
+        return True
+
+    def _scan(self):
+        """
+        Find the records by walking the file, for one that wasn't closed.
+        A record cut off part way is ignored.
+        """
+        data = self.data
+        self.offsets = []
+        self.styles = []
+        offset = HEADER.size
+
+        while offset + RECORD.size <= len(data):
+            kind, codec, _, _, stored = RECORD.unpack_from(data, offset)
+            start = offset + RECORD.size
+            end = start + stored
+            if end > len(data):
+                break
+            if kind == STYLES:
+                styles, _ = _decode_styles(_decompress(data[start:end], codec))
+                self.styles.extend(styles)
+            else:
+                self.offsets.append(offset)
+            offset = end
+
+        self.end = offset
+
+    def duration(self, index: int) -> float:
+        """
+        Get a frame's duration.
+        """
+        return RECORD.unpack_from(self.data, self.offsets[index])[2]
+
+    def buffer(self, index: int) -> Buffer:
+        """
+        Decode a frame's own buffer, which is only the changes for a delta.
+        """
+        offset = self.offsets[index]
+        _, codec, _, _, stored = RECORD.unpack_from(self.data, offset)
+        start = offset + RECORD.size
+        end = start + stored
+        return _decode_buffer(_decompress(self.data[start:end], codec), self.ids)
+
+    def frame(self, index: int) -> Frame:
+        """
+        Decode a frame, on its own.
+        """
+        frame_type = KeyFrame if self._kinds[index] == KEY else DeltaFrame
+        return frame_type(self.buffer(index), self.duration(index))
+
+    def animation(self) -> Animation:
+        """
+        Get an animation of this file's frames, each decoded the first time
+        it's needed.
+        """
+        animation = Animation()
+        for index, kind in enumerate(self._kinds):
+            frame_type = StoredKeyFrame if kind == KEY else StoredDeltaFrame
+            animation.add(frame_type(self, index))
+        return animation
+
+
+class StoredFrame:
+    """
+    Mixin for frames that decode their buffer from an AnimationFile when
+    it's first needed.
+    """
+
+    def __init__(self, file: AnimationFile, index: int):
+        super().__init__(None, file.duration(index))
+        self.file = file
+        self.index = index
+
+    @property
+    def buffer(self) -> Buffer:
+        if self._buffer is None:
+            self._buffer = self.file.buffer(self.index)
+        return self._buffer
+
+    @buffer.setter
+    def buffer(self, value: Buffer):
+        Frame.buffer.fset(self, value)
+
+
+class StoredKeyFrame(StoredFrame, KeyFrame):
+    pass
+
+
+class StoredDeltaFrame(StoredFrame, DeltaFrame):
+    pass
+
+
+def save(animation: Animation, path, codec: str = "zlib"):
+    """
+    Write a whole animation to a file.
+    """
+    animation.load()
+    with AnimationWriter(path, codec) as writer:
+        for frame in animation.frames:
+            writer.add(frame)
+
+
+def open_animation(path) -> Animation:
+    """
+    Open an animation file, decoding frames as they're needed.
+    """
+    return AnimationFile(path).animation()
@@ -0,0 +1,656 @@
+from array import array
+
+from rich.segment import Segment
+
+from ..core.box import Box
+from ..core.versioned import changes, waits
+from .buffer import CHAR_BITS, Buffer
+
+try:
+    import numpy
+except ImportError:  # the pure Python diff does the same, only slower
+    numpy = None
+
+EMPTY = 0  # code point used for unset cells
+
+
+def _zeros(count: int) -> array:
+    """
+    Allocate an array of empty cells.
+    """
+    return array("I", bytes(4 * count))
+
+
+def _codes(text: str) -> array:
+    """
+    Convert a string to an array of code points.
+    """
+    return array("I", text.encode("utf-32-le"))
+
+
+def _runs(chars: array, start: int = 0, end: int = None):
+    """
+    Find the runs of set cells in a row of code points.
+
+    Yields:
+        (start, end) index pairs for each run
+    """
+    end = len(chars) if end is None else end
+    i = start
+    while i < end:
+        if chars[i] == EMPTY:
+            i += 1
+            continue
+        try:
+            stop = min(chars.index(EMPTY, i, end), end)
+        except ValueError:
+            stop = end
+        yield i, stop
+        i = stop
+
+
+if numpy is not None:
+
+    def _plane(values: array):
+        """
+        View an array of cells as a NumPy array, without copying.
+        """
+        return numpy.frombuffer(values, dtype=numpy.uint32)
+
+    def _changed_cells(row, other, a: int, b: int, n: int):
+        """
+        Find the set cells in `row` that differ from `other`, where
+        row[a:a + n] overlaps other[b:b + n].
+
+        Returns:
+            A boolean array, or None if nothing differs
+        """
+        mask = _plane(row.chars) != EMPTY
+        if n:
+            a_end, b_end = a + n, b + n
+            same = _plane(row.chars)[a:a_end] == _plane(other.chars)[b:b_end]
+            same &= _plane(row.styles)[a:a_end] == _plane(other.styles)[b:b_end]
+            mask[a:a_end] &= ~same
+        return mask if mask.any() else None
+
+    def _keep(row, mask):
+        """
+        Clear the cells of a row that aren't in the mask.
+        """
+        _plane(row.chars)[~mask] = EMPTY
+
+    def _all(mask) -> bool:
+        return bool(mask.all())
+
+else:
+
+    def _changed_cells(row, other, a: int, b: int, n: int):
+        """
+        Find the set cells in `row` that differ from `other`, where
+        row[a:a + n] overlaps other[b:b + n].
+
+        Returns:
+            A list of flags, or None if nothing differs
+        """
+        mask = [char != EMPTY for char in row.chars]
+        if n:
+            a_end, b_end = a + n, b + n
+            pairs = zip(
+                row.chars[a:a_end],
+                row.styles[a:a_end],
+                other.chars[b:b_end],
+                other.styles[b:b_end],
+            )
+            for i, (char, style, other_char, other_style) in enumerate(pairs, a):
+                if char == other_char and style == other_style:
+                    mask[i] = False
+        return mask if any(mask) else None
+
+    def _keep(row, mask):
+        """
+        Clear the cells of a row that aren't in the mask.
+        """
+        chars = row.chars
+        for i, keep in enumerate(mask):
+            if not keep:
+                chars[i] = EMPTY
+
+    def _all(mask) -> bool:
+        return all(mask)
+
+
+def _changed_row(row, other):
+    """
+    Compare a row against another one, which may be None.
+
+    Returns:
+        None if nothing differs, otherwise a mask that is true for each
+        set cell in `row` that differs from `other`.
+    """
+    if other is None:
+        return _changed_cells(row, None, 0, 0, 0)
+
+    lo = max(row.start, other.start)
+    hi = min(row.end, other.end)
+    a, b = lo - row.start, lo - other.start
+    n = max(hi - lo, 0)
+    end = b + n
+
+    if (
+        n == len(row.chars)
+        and row.chars == other.chars[b:end]
+        and row.styles == other.styles[b:end]
+    ):
+        return None
+
+    return _changed_cells(row, other, a, b, n)
+
+
+if numpy is not None:
+
+    def _stack(arrays: list, width: int):
+        """
+        Copy same-length arrays of cells into one 2D NumPy array.
+        """
+        plane = numpy.frombuffer(b"".join(arrays), dtype=numpy.uint32)
+        return plane.reshape(len(arrays), width)
+
+    def _changed_rows(rows: dict, others: dict) -> dict:
+        """
+        Compare every row against the same row in `others`.
+
+        Returns:
+            {y: mask} for the rows with changes
+        """
+        result = {}
+        aligned = {}  # {width: [y, ...]} for rows that line up with the other's
+
+        for y, row in rows.items():
+            other = others.get(y)
+            if (
+                other is not None
+                and other.start == row.start
+                and len(other.chars) == len(row.chars)
+            ):
+                if row.chars != other.chars or row.styles != other.styles:
+                    aligned.setdefault(len(row.chars), []).append(y)
+                continue
+
+            mask = _changed_row(row, other)
+            if mask is not None:
+                result[y] = mask
+
+        for width, ys in aligned.items():
+            chars = _stack([rows[y].chars for y in ys], width)
+            styles = _stack([rows[y].styles for y in ys], width)
+            other_chars = _stack([others[y].chars for y in ys], width)
+            other_styles = _stack([others[y].styles for y in ys], width)
+
+            masks = (chars != other_chars) | (styles != other_styles)
+            masks &= chars != EMPTY
+            for y, mask, differs in zip(ys, masks, masks.any(axis=1)):
+                if differs:
+                    result[y] = mask
+
+        return result
+
+else:
+
+    def _changed_rows(rows: dict, others: dict) -> dict:
+        """
+        Compare every row against the same row in `others`.
+
+        Returns:
+            {y: mask} for the rows with changes
+        """
+        result = {}
+        for y, row in rows.items():
+            mask = _changed_row(row, others.get(y))
+            if mask is not None:
+                result[y] = mask
+        return result
+
+
+class Row:
+    """
+    A dense run of cells: parallel arrays of code points and style ids,
+    starting at column `start`.
+    """
+
+    __slots__ = ("start", "chars", "styles")
+
+    def __init__(self, start: int = 0, chars: array = None, styles: array = None):
+        self.start = start
+        self.chars = _zeros(0) if chars is None else chars
+        self.styles = _zeros(len(self.chars)) if styles is None else styles
+
+    def __len__(self):
+        return len(self.chars)
+
+    @property
+    def end(self) -> int:
+        """
+        One past the last column covered by this row.
+        """
+        return self.start + len(self.chars)
+
+    def cover(self, min_x: int, max_x: int):
+        """
+        Grow the row so it covers columns min_x to max_x (exclusive).
+        """
+        if not self.chars:
+            self.start = min_x
+            self.chars = _zeros(max_x - min_x)
+            self.styles = _zeros(max_x - min_x)
+            return
+
+        if min_x < self.start:
+            pad = _zeros(self.start - min_x)
+            self.chars[0:0] = pad
+            self.styles[0:0] = pad
+            self.start = min_x
+
+        if max_x > self.end:
+            pad = _zeros(max_x - self.end)
+            self.chars.extend(pad)
+            self.styles.extend(pad)
+
+    def count(self) -> int:
+        """
+        Count the cells that are set.
+        """
+        return len(self.chars) - self.chars.count(EMPTY)
+
+    def bounds(self):
+        """
+        Get the first and last+1 columns that are set, or None if empty.
+        """
+        # Strip the empty cells as bytes. A set cell always has a non-zero
+        # byte, so whole cells of zeros are empty ones.
+        data = self.chars.tobytes()
+        leading = (len(data) - len(data.lstrip(b"\0"))) // self.chars.itemsize
+        if leading == len(self.chars):
+            return None
+        trailing = (len(data) - len(data.rstrip(b"\0"))) // self.chars.itemsize
+        return self.start + leading, self.end - trailing
+
+    def slice(self, min_x: int, max_x: int) -> "Row":
+        """
+        Copy the part of this row between min_x and max_x (exclusive).
+        """
+        lo = max(min_x, self.start) - self.start
+        hi = min(max_x, self.end) - self.start
+        if hi <= lo:
+            return Row()
+        return Row(self.start + lo, self.chars[lo:hi], self.styles[lo:hi])
+
+    def trim(self, min_x: int, max_x: int):
+        """
+        Cut the row down to the part between min_x and max_x (exclusive),
+        in place.
+        """
+        lo = max(min_x, self.start) - self.start
+        hi = max(min(max_x, self.end) - self.start, lo)
+        del self.chars[hi:]
+        del self.styles[hi:]
+        del self.chars[:lo]
+        del self.styles[:lo]
+        self.start += lo
+
+    def copy(self) -> "Row":
+        return Row(self.start, self.chars[:], self.styles[:])
+
+
+class DenseBuffer(Buffer):
+    """
+    A 2D grid stored as rows of code point and style id arrays.
+
+    Costs a few bytes per cell rather than a Segment per cell, so it's a
+    better fit for full-screen frames. Reads build Segments on the fly.
+    """
+
+    row_type = Row
+
+    def __init__(self, threadsafe: bool = True):
+        """
+        Initialize the buffer with no rows.
+
+        Args:
+            threadsafe: Lock around writes
+        """
+        super().__init__(threadsafe)
+        self._data = {}  # {y: Row}
+
+    def __getitem__(self, coords):
+        """
+        Get the item at the given coordinates.
+
+        Args:
+            coords: A tuple of (x, y) coordinates
+
+        Returns:
+            The Segment at those coordinates or None if empty
+        """
+        x, y = coords
+        row = self._data.get(y)
+        if row is None:
+            return None
+        i = x - row.start
+        if i < 0 or i >= len(row.chars):
+            return None
+        char = row.chars[i]
+        if char == EMPTY:
+            return None
+        return Segment(chr(char), self.styles[row.styles[i]])
+
+    @changes
+    def __delitem__(self, coords):
+        """
+        Clear the cell at the given coordinates, if it's set.
+
+        Args:
+            coords: A tuple of (x, y) coordinates
+        """
+        x, y = coords
+        if self._cell(x, y) is None:
+            return
+
+        row = self._writable(y)
+        row.chars[x - row.start] = EMPTY
+        self._size -= 1
+        self._box = None
+        if not row.count():
+            del self._data[y]
+            self._shared.discard(y)
+
+    @changes
+    def blit(self, other: Buffer, x: int = 0, y: int = 0):
+        """
+        Copy another buffer's cells into this one, offset by x and y.
+        Runs of set cells are copied as array slices.
+
+        Args:
+            other: Buffer to copy from
+            x: Columns to move the cells right by
+            y: Rows to move the cells down by
+        """
+        if not isinstance(other, Buffer):
+            raise TypeError(f"Cannot merge {type(other)} with Buffer")
+
+        # Onto itself, we'd be reading rows as we wrote them
+        if other is self:
+            other = other.copy()
+
+        if not isinstance(other, DenseBuffer):
+            for cell_x, cell_y, segment in other.cells():
+                self.set_row(cell_x + x, cell_y + y, segment.text, segment.style)
+            return
+
+        if self._box is not None and other.box:
+            box = other.box
+            self._box += Box(box.min_x + x, box.min_y + y, box.max_x + x, box.max_y + y)
+
+        for src_y, src in other._data.items():
+            dst_y = src_y + y
+            if dst_y not in self._data:
+                # Nothing to merge with, so take a copy of the whole row
+                self._data[dst_y] = Row(src.start + x, src.chars[:], src.styles[:])
+                self._size += src.count()
+                continue
+
+            dst = self._writable(dst_y)
+            dst.cover(src.start + x, src.end + x)
+            offset = src.start + x - dst.start
+            for lo, hi in _runs(src.chars):
+                a, b = lo + offset, hi + offset
+                self._size += dst.chars[a:b].count(EMPTY)
+                dst.chars[a:b] = src.chars[lo:hi]
+                dst.styles[a:b] = src.styles[lo:hi]
+
+    def __and__(self, box: Box) -> "DenseBuffer":
+        """
+        Crop the buffer to the given box.
+        Returns a newly allocated buffer.
+        """
+        result = type(self)(self.threadsafe)
+        for y in self._rows_between(box.min_y, box.max_y):
+            cropped = self._data[y].slice(box.min_x, box.max_x)
+            count = cropped.count()
+            if count:
+                result._data[y] = cropped
+                result._size += count
+
+        result._box = None  # worked out when it's needed
+        return result
+
+    @changes
+    def __iand__(self, box: Box) -> "DenseBuffer":
+        """
+        Crop the buffer to the given box.
+        This modifies the buffer in place, trimming rows rather than
+        building new ones.
+        """
+        for y in list(self._data):
+            row = self._data[y]
+            if not box.min_y <= y < box.max_y:
+                self._size -= row.count()
+                self._box = None
+                del self._data[y]
+                self._shared.discard(y)
+                continue
+            if box.min_x <= row.start and row.end <= box.max_x:
+                continue
+
+            before = row.count()
+            if y in self._shared:
+                row = self._data[y] = row.slice(box.min_x, box.max_x)
+                self._shared.discard(y)
+            else:
+                row.trim(box.min_x, box.max_x)
+            count = row.count()
+            self._size -= before - count
+            self._box = None
+            if not count:
+                del self._data[y]
+
+        return self
+
+    def __sub__(self, other: Buffer) -> "DenseBuffer":
+        """
+        Create a new buffer representing the difference: self - other.
+        Only includes cells in self that differ from other.
+        """
+        if not isinstance(other, DenseBuffer):
+            delta = type(self)(self.threadsafe)
+            for x, y, segment in self.cells():
+                if self._cell(x, y) != other._cell(x, y):
+                    delta.set(x, y, segment)
+            return delta
+
+        delta = type(self)(self.threadsafe)
+        for y, mask in self.changed(other).items():
+            out = self._data[y].copy()
+            _keep(out, mask)
+            delta._data[y] = out
+            delta._size += out.count()
+
+        delta._box = None
+        return delta
+
+    @changes
+    def __isub__(self, other: Buffer) -> "DenseBuffer":
+        """
+        Remove from self any cells that are identical in other.
+        Modifies the buffer in-place.
+        """
+        touched = set()  # rows we removed cells from
+
+        if not isinstance(other, DenseBuffer):
+            for x, y, _ in list(self.cells()):
+                if self._cell(x, y) == other._cell(x, y):
+                    row = self._writable(y)
+                    row.chars[x - row.start] = EMPTY
+                    self._size -= 1
+                    touched.add(y)
+        else:
+            changed = self.changed(other)
+            for y in list(self._data):
+                mask = changed.get(y)
+                if mask is None:
+                    self._size -= self._data.pop(y).count()
+                    self._shared.discard(y)
+                    self._box = None
+                elif not _all(mask):
+                    row = self._writable(y)
+                    before = row.count()
+                    _keep(row, mask)
+                    self._size -= before - row.count()
+                    touched.add(y)
+
+        for y in touched:
+            if not self._data[y].count():
+                del self._data[y]
+                self._shared.discard(y)
+        if touched:
+            self._box = None
+
+        return self
+
+    @waits
+    def changed(self, other: "DenseBuffer") -> dict:
+        """
+        Find the set cells that differ from another buffer, in one pass.
+
+        With NumPy available, rows that line up with a row of the same span
+        in `other`, as a screen's rows do, are compared together as 2D
+        planes of code points and style ids.
+
+        Returns:
+            {y: mask} for each row with changes. Masks are true for the cells
+            that differ, counting from the row's start.
+        """
+        return _changed_rows(self._data, other._data)
+
+    @changes
+    def set_row(self, x, y, text: str, style=None):
+        """
+        Write a string along a row in one style, as one array slice.
+
+        Args:
+            x: Starting X coordinate
+            y: Y coordinate
+            text: Characters to write, one per cell
+            style: Style for all of them
+        """
+        count = len(text)
+        if not count:
+            return
+
+        # A stale box gets worked out from the rows, new cells included
+        if self._box is not None:
+            self._box.update(x, y)
+            self._box.update(x + count - 1, y)
+
+        row = self._writable(y)
+        row.cover(x, x + count)
+
+        i = x - row.start
+        j = i + count
+        self._size += row.chars[i:j].count(EMPTY)
+        row.chars[i:j] = _codes(text)
+        row.styles[i:j] = array("I", [self.styles.intern(style)]) * count
+
+    @changes
+    def fill(self, box: Box, char: str = " ", style=None):
+        """
+        Fill a box with one character in one style.
+
+        Args:
+            box: Area to fill
+            char: Character for every cell
+            style: Style for every cell
+        """
+        if not len(box):
+            return
+
+        if self._box is not None:
+            self._box += box
+        width = box.width
+        chars = array("I", [ord(char)]) * width
+        styles = array("I", [self.styles.intern(style)]) * width
+        for y in range(box.min_y, box.max_y):
+            row = self._writable(y)
+            row.cover(box.min_x, box.max_x)
+            i = box.min_x - row.start
+            j = i + width
+            self._size += row.chars[i:j].count(EMPTY)
+            row.chars[i:j] = chars
+            row.styles[i:j] = styles
+
+    def cells(self):
+        """
+        Iterate over every cell that is set.
+
+        Yields:
+            (x, y, segment) tuples
+        """
+        for y, row in self._data.items():
+            for i, char in enumerate(row.chars):
+                if char != EMPTY:
+                    yield row.start + i, y, Segment(
+                        chr(char), self.styles[row.styles[i]]
+                    )
+
+    def _cell(self, x, y):
+        """
+        Get the packed cell at the given coordinates, or None if empty.
+        """
+        row = self._data.get(y)
+        if row is None:
+            return None
+        i = x - row.start
+        if i < 0 or i >= len(row.chars) or row.chars[i] == EMPTY:
+            return None
+        return (row.styles[i] << CHAR_BITS) | row.chars[i]
+
+    @staticmethod
+    def _pickle_row(row, local):
+        """
+        Flatten a row to bytes, with its style ids swapped for local ones.
+        """
+        styles = array(
+            "I", [local.setdefault(style_id, len(local)) for style_id in row.styles]
+        )
+        return row.start, row.chars.tobytes(), styles.tobytes()
+
+    @staticmethod
+    def _unpickle_row(row, ids):
+        """
+        Rebuild a pickled row, with its local style ids swapped for global ones.
+        """
+        start, chars, styles = row
+        styles = array("I", [ids[style_id] for style_id in array("I", styles)])
+        return Row(start, array("I", chars), styles)
+
+    @changes
+    def recalculate(self, size: bool = True, box: bool = True):
+        """
+        Recalculate the size and box
+        """
+        if size:
+            self._size = sum(row.count() for row in self._data.values())
+
+        if box:
+            self._box = self._bounds()
+
+    def _bounds(self) -> Box:
+        """
+        Work out the bounding box from the rows.
+        """
+        box = Box()
+        for y, row in self._data.items():
+            bounds = row.bounds()
+            if bounds:
+                box.update(bounds[0], y)
+                box.update(bounds[1] - 1, y)
+        return box
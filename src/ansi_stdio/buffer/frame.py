@@ -20,6 +20,8 @@ class Frame(Versioned):
         self._time: float = 0.0
         self._parent: Optional[Frame] = parent
         self._child: Optional[Frame] = None
+        self._animation = None  # set when added to an Animation
+        self._index: int = 0
         if parent:
             parent._child = self
             self._time = parent.time + parent.duration
@@ -42,6 +44,7 @@ class Frame(Versioned):
     def duration(self, value: float):
         self._duration = value
         self._update_timing()
+        self._retimed()
 
     @property
     def time(self) -> float:
@@ -58,11 +61,26 @@ class Frame(Versioned):
         if frame:
             frame._child = self
         self._update_timing()
+        self._retimed()
 
     @property
     def child(self) -> Optional[Frame]:
         return self._child
 
+    @property
+    def cache_key(self) -> int:
+        """
+        Changes whenever this frame or its parent changes.
+        """
+        return hash(self)
+
+    def _retimed(self):
+        """
+        Tell the owning animation that frame times changed from here on.
+        """
+        if self._animation is not None:
+            self._animation._retime(self._index)
+
     def _update_timing(self):
         if self._parent:
             self._time = self._parent.time + self._parent.duration
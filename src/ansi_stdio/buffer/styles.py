@@ -0,0 +1,54 @@
+import threading
+
+
+class StyleTable:
+    """
+    Interns styles as small integers, so cells can store an int instead of
+    a full style object.
+
+    Id 0 is always the empty (None) style.
+    """
+
+    def __init__(self):
+        self._ids = {None: 0}  # {style: id}
+        self._styles = [None]  # [style, ...] indexed by id
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """
+        Get the number of interned styles.
+        """
+        return len(self._styles)
+
+    def __getitem__(self, style_id: int):
+        """
+        Look up a style by its id.
+        """
+        return self._styles[style_id]
+
+    def intern(self, style) -> int:
+        """
+        Get the id for a style, adding it to the table if it's new.
+
+        Args:
+            style: A rich Style, a style string or None
+
+        Returns:
+            The integer id of the style
+        """
+        style_id = self._ids.get(style)
+        if style_id is not None:
+            return style_id
+
+        with self._lock:
+            style_id = self._ids.get(style)
+            if style_id is None:
+                style_id = len(self._styles)
+                self._styles.append(style)
+                self._ids[style] = style_id
+
+        return style_id
+
+
+# Shared by every buffer, so style ids mean the same thing everywhere
+styles = StyleTable()
@@ -16,7 +16,8 @@ from typing import Optional
 
 from ansi_stdio.terminal.capture import capture_terminal
 from ansi_stdio.terminal.info import get_terminal_size
-from ansi_stdio.terminal.render import display_screen
+from ansi_stdio.terminal.render import COLOR_MODES, TRUECOLOR
+from ansi_stdio.terminal.writer import ScreenWriter
 
 
 def parse_arguments():
@@ -43,6 +44,12 @@ def parse_arguments():
         default=1.0,
         help="Frames per second for output capture (default: 1.0)",
     )
+    parser.add_argument(
+        "--colors",
+        choices=COLOR_MODES,
+        default=TRUECOLOR,
+        help="Reduce colors to fit this mode (default: truecolor)",
+    )
     return parser.parse_args()
 
 
@@ -51,6 +58,7 @@ def quantize_output(
     width: Optional[int] = None,
     height: Optional[int] = None,
     fps: float = 1.0,
+    colors: str = TRUECOLOR,
 ):
     """
     Capture and quantize terminal output from a Python script.
@@ -60,6 +68,7 @@ def quantize_output(
         width (int, optional): Terminal width
         height (int, optional): Terminal height
         fps (float, optional): Output frames per second
+        colors (str, optional): Color mode to reduce output to
     """
     # Determine terminal dimensions
     if width is None or height is None:
@@ -70,6 +79,7 @@ def quantize_output(
     # Calculate time between frames
     frame_interval = 1.0 / fps
     last_dump_time = 0
+    writer = ScreenWriter(colors=colors)
 
     def quantized_display_callback(screen):
         nonlocal last_dump_time
@@ -77,18 +87,22 @@ def quantize_output(
 
         # Only dump if enough time has passed since last dump
         if current_time - last_dump_time >= frame_interval:
-            display_screen(screen, dirty_only=True)
+            writer.write(screen, dirty_only=True)
             last_dump_time = current_time
 
     # Capture terminal output with quantized display
     command = f"{script}"
-    capture_terminal(
+    screen = capture_terminal(
         program=command,
         width=width,
         height=height,
         display_callback=quantized_display_callback,
     )
 
+    # Make sure the final state makes it out
+    writer.write(screen, dirty_only=True)
+    writer.close()
+
 
 def main():
     """Main entry point for the terminal quantizer."""
@@ -96,7 +110,11 @@ def main():
 
     try:
         quantize_output(
-            script=args.script, width=args.width, height=args.height, fps=args.fps
+            script=args.script,
+            width=args.width,
+            height=args.height,
+            fps=args.fps,
+            colors=args.colors,
         )
     except Exception as e:
         print(f"Error running script: {e}")
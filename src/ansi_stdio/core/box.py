@@ -27,9 +27,9 @@ class Box:
         Combine two boxes into a new box that encompasses both.
         """
         if not self:
-            return other
+            return Box(other.min_x, other.min_y, other.max_x, other.max_y)
         if not other:
-            return self
+            return Box(self.min_x, self.min_y, self.max_x, self.max_y)
         return Box(
             min_x=min(self.min_x, other.min_x),
             min_y=min(self.min_y, other.min_y),
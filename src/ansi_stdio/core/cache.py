@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class Cache:
+    """
+    A least-recently-used cache, limited by entry count and total size.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 64,
+        max_size: int = 0,
+        sizeof: Callable[[Any], int] = len,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Most items to keep. 0 for no limit.
+            max_size: Most total size to keep, as measured by sizeof.
+                0 for no limit.
+            sizeof: Function that gives the size of a value.
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self._items: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        """
+        Get the number of items in the cache.
+        """
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Check for a key without touching the counters or the LRU order.
+        """
+        return key in self._items
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of everything in the cache.
+        """
+        return self._size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a value, marking it as recently used.
+
+        Returns:
+            The value, or default if it's not cached
+        """
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Store a value, evicting the least recently used ones to make room.
+        Values that are bigger than the whole cache are not stored.
+        """
+        size = self.sizeof(value)
+        if self.max_size and size > self.max_size:
+            return
+
+        self.discard(key)
+        self._items[key] = (value, size)
+        self._size += size
+
+        while self._items and (
+            (self.max_entries and len(self._items) > self.max_entries)
+            or (self.max_size and self._size > self.max_size)
+        ):
+            _, (_, evicted) = self._items.popitem(last=False)
+            self._size -= evicted
+            self.evictions += 1
+
+    def discard(self, key: Hashable):
+        """
+        Remove a key if it's cached.
+        """
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._size -= item[1]
+
+    def clear(self):
+        """
+        Empty the cache. The counters are left alone.
+        """
+        self._items.clear()
+        self._size = 0
@@ -1,22 +1,62 @@
 import threading
+from contextlib import contextmanager, nullcontext
 from functools import wraps
 
+# Stands in for the lock when an object isn't shared between threads
+NO_LOCK = nullcontext()
+
 
 class Versioned:
     """
     Inherit this class to store a version number on each change.
     """
 
-    def __init__(self):
+    def __init__(self, threadsafe: bool = True):
+        """
+        Args:
+            threadsafe: Lock around changes. Pass False for objects that only
+                one thread touches (or that you lock yourself), and the
+                version becomes a plain counter.
+        """
         self._version = 0
-        self._lock = threading.RLock()
+        self._lock = threading.RLock() if threadsafe else NO_LOCK
+        self._batches = 0  # open batch() blocks
+
+    @property
+    def threadsafe(self) -> bool:
+        """
+        Whether changes take the lock.
+        """
+        return self._lock is not NO_LOCK
 
     def change(self):
         """
         Call this if you changed something and need to blow caches
         """
         with self._lock:
-            self._version += 1
+            if not self._batches:
+                self._version += 1
+
+    @contextmanager
+    def batch(self):
+        """
+        Make a run of changes count as one.
+
+        Holds the lock for the whole block so the changes inside only
+        re-enter it, and bumps the version once at the end:
+
+            with buffer.batch():
+                for y, line in enumerate(lines):
+                    buffer.set_row(0, y, line)
+        """
+        with self._lock:
+            self._batches += 1
+            try:
+                yield self
+            finally:
+                self._batches -= 1
+                if not self._batches:
+                    self._version += 1
 
     @property
     def version(self):
@@ -39,9 +79,17 @@ def changes(method):
 
     @wraps(method)
     def wrapper(self, *args, **kwargs):
-        with self._lock:
+        lock = self._lock
+        if lock is NO_LOCK:
             result = method(self, *args, **kwargs)
-            self._version += 1
+            if not self._batches:
+                self._version += 1
+            return result
+
+        with lock:
+            result = method(self, *args, **kwargs)
+            if not self._batches:
+                self._version += 1
         return result
 
     return wrapper
@@ -54,7 +102,11 @@ def waits(method):
 
     @wraps(method)
     def wrapper(self, *args, **kwargs):
-        with self._lock:
+        lock = self._lock
+        if lock is NO_LOCK:
+            return method(self, *args, **kwargs)
+
+        with lock:
             result = method(self, *args, **kwargs)
         return result
 
@@ -1,23 +1,37 @@
-from functools import lru_cache
 from pathlib import Path
 
+from . import cache
+
 LOADERS = []
 
 
 def load(path: Path):
     """
     Loads a buffer-like object from a file.
+
+    Results are kept in an on-disk cache, so opening the same file again
+    skips the parsing. Loaders that set a false `cache` attribute are
+    never cached.
     """
-    _load_cached(path.resolve())
+    path = path.resolve()
+    cache_file = cache.entry(path)
 
+    animation = cache.read(cache_file)
+    if animation is not None:
+        return animation
 
-@lru_cache
-def _load_cached(absolute_path: Path):
-    """
-    Caches the load operation by absolute path.
-    """
     for loader in LOADERS:
         try:
-            return loader(absolute_path)
+            animation = loader(path)
         except ValueError:
-            pass
+            continue
+
+        if getattr(loader, "cache", True):
+            cache.write_when_loaded(cache_file, animation)
+        return animation
+
+
+# Register the loaders. Formats with a header to check go first, since the
+# ANSI loader takes anything with a plausible suffix.
+from . import asciinema  # noqa: E402, F401  isort: skip
+from . import ansi  # noqa: E402, F401  isort: skip
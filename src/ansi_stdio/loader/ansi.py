@@ -1,11 +1,179 @@
+import codecs
+import mmap
+from pathlib import Path
+
+import pyte
+
+from ..buffer.animation import Animation
+from ..buffer.buffer import Buffer
+from ..buffer.frame import KeyFrame
 from ..loader import LOADERS
+from ..terminal.convert import screen_to_buffer
+
+# File types we'll treat as raw terminal output. No suffix is for `script`'s
+# "typescript" and the like.
+SUFFIXES = {"", ".ans", ".ansi", ".asc", ".log", ".txt"}
+
+# Sequences that wipe the screen, which is where one frame ends and the next begins
+CLEAR_SCREEN = (b"\x1b[2J", b"\x1bc")
+
+# Cursor homes that usually come just before a clear, and go with it
+HOME = (b"\x1b[H", b"\x1b[1;1H")
+
+# How much to decode and feed to pyte at a time
+CHUNK_SIZE = 64 * 1024
+
+# DOS end of file, which .ans files put before their SAUCE record
+EOF_MARKER = b"\x1a"
+
+
+class AnsiFile:
+    """
+    A memory-mapped file of ANSI output, split into frames at each clear
+    screen.
+
+    The frame boundaries are found up front with a scan of the map, so any
+    frame can be parsed on its own without reading the ones before it.
+    """
+
+    def __init__(self, path, width: int = 80, min_height: int = 24):
+        """
+        Args:
+            path: File to map
+            width: Terminal width to parse at
+            min_height: Fewest lines to give the terminal. Frames with more
+                lines than this get a taller one, so nothing scrolls off.
+        """
+        self.width = width
+        self.min_height = min_height
+
+        with open(path, "rb") as file:
+            try:
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                self.data = b""  # empty files can't be mapped
+
+        end = self.data.find(EOF_MARKER)
+        self.end = end if end >= 0 else len(self.data)
+        self.offsets = self._index()
+
+    def __len__(self):
+        """
+        Get the number of frames.
+        """
+        return len(self.offsets)
+
+    def _index(self) -> list[int]:
+        """
+        Find the offset of each frame.
+        """
+        data = self.data
+        offsets = [0]
+
+        for marker in CLEAR_SCREEN:
+            position = data.find(marker, 0, self.end)
+            while position >= 0:
+                offsets.append(position)
+                position = data.find(marker, position + len(marker), self.end)
+
+        # Move each boundary back over a cursor home just before it
+        for i, offset in enumerate(offsets):
+            for home in HOME:
+                start = offset - len(home)
+                if start >= 0 and data[start:offset] == home:
+                    offsets[i] = start
+                    break
+
+        return [offset for offset in sorted(set(offsets)) if offset < self.end] or [0]
+
+    def span(self, index: int) -> tuple[int, int]:
+        """
+        Get the start and end offsets of a frame.
+        """
+        start = self.offsets[index]
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else self.end
+        return start, end
+
+    def buffer(self, index: int) -> Buffer:
+        """
+        Parse a frame into a buffer.
+        """
+        start, end = self.span(index)
+        height = max(self.min_height, self._count(b"\n", start, end) + 1)
+        screen = pyte.Screen(self.width, height)
+        screen.set_mode(pyte.modes.LNM)
+        stream = pyte.Stream(screen)
+
+        # Terminal dumps are UTF-8, but older art is in code page 437
+        try:
+            self._feed(stream, start, end, "utf-8", "strict")
+        except UnicodeDecodeError:
+            # Start over, without any escape sequence we were halfway through
+            screen.reset()
+            screen.set_mode(pyte.modes.LNM)
+            stream = pyte.Stream(screen)
+            self._feed(stream, start, end, "cp437", "replace")
+
+        return screen_to_buffer(screen)
+
+    def _count(self, sub: bytes, start: int, end: int) -> int:
+        """
+        Count the non-overlapping occurrences of some bytes in part of the file.
+        """
+        count = 0
+        position = self.data.find(sub, start, end)
+        while position >= 0:
+            count += 1
+            position = self.data.find(sub, position + len(sub), end)
+        return count
+
+    def _feed(self, stream: pyte.Stream, start: int, end: int, encoding, errors):
+        """
+        Feed part of the file to pyte a chunk at a time.
+        """
+        decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+        for offset in range(start, end, CHUNK_SIZE):
+            chunk_end = min(offset + CHUNK_SIZE, end)
+            stream.feed(decoder.decode(self.data[offset:chunk_end]))
+        stream.feed(decoder.decode(b"", final=True))
+
+
+class AnsiFrame(KeyFrame):
+    """
+    A frame of an AnsiFile, parsed the first time its buffer is needed.
+    """
+
+    def __init__(self, file: AnsiFile, index: int, duration: float = 0.1):
+        super().__init__(None, duration)
+        self.file = file
+        self.index = index
+
+    @property
+    def buffer(self) -> Buffer:
+        if self._buffer is None:
+            self._buffer = self.file.buffer(self.index)
+        return self._buffer
+
+    @buffer.setter
+    def buffer(self, value: Buffer):
+        KeyFrame.buffer.fset(self, value)
 
 
 def load(path):
     """
     Loads ANSI data from a file
     """
-    raise ValueError("Well that didn't work did it?")
+    if Path(path).suffix.lower() not in SUFFIXES:
+        raise ValueError(f"Not an ANSI file: {path}")
+
+    file = AnsiFile(path)
+    animation = Animation()
+    for index in range(len(file)):
+        animation.add(AnsiFrame(file, index))
+    return animation
+
 
+# Mapped files already open quickly, and caching would parse every frame
+load.cache = False
 
 LOADERS.append(load)
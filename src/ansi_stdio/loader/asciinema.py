@@ -1,11 +1,77 @@
+import json
+
+import pyte
+
+from ..buffer.animation import Animation
 from ..loader import LOADERS
+from ..terminal.record import Recorder
 
 
 def load(path):
     """
-    Loads asciinema data from a file
+    Loads asciinema v2 data from a file.
+
+    Only the header is read up front. Events are fed through pyte as
+    playback reaches them, so a long recording starts playing straight
+    away and is never held in memory all at once.
+    """
+    with open(path, encoding="utf-8") as file:
+        header = _header(file.readline())
+
+    return Animation(source=_frames(path, header))
+
+
+def _header(line):
+    """
+    Parse and check the header line of a cast file.
+    """
+    header = json.loads(line)
+    if not isinstance(header, dict) or header.get("version") != 2:
+        raise ValueError("Not an asciinema v2 file")
+    return header
+
+
+def _frames(path, header):
+    """
+    Play a cast file through pyte, yielding a frame for each change.
     """
-    raise ValueError("Well that didn't work did it?")
+    screen = pyte.Screen(header["width"], header["height"])
+    stream = pyte.Stream(screen)
+    recorder = Recorder()
+    idle_limit = header.get("idle_time_limit")
+
+    # Start with the blank screen, so the first output shows at its own time
+    pending = recorder.diff(screen)
+    started = 0.0
+
+    with open(path, encoding="utf-8") as file:
+        file.readline()
+        for line in file:
+            try:
+                time, code, data = json.loads(line)
+            except ValueError:
+                continue  # blank or truncated line
+
+            if code == "o":
+                stream.feed(data)
+            elif code == "r":
+                columns, lines = data.split("x")
+                screen.resize(int(lines), int(columns))
+            else:
+                continue
+
+            frame = recorder.diff(screen)
+            if frame is None:
+                continue
+
+            duration = time - started
+            if idle_limit:
+                duration = min(duration, idle_limit)
+            pending.duration = duration
+            yield pending
+            pending, started = frame, time
+
+    yield pending
 
 
 LOADERS.append(load)
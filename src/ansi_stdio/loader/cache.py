@@ -0,0 +1,120 @@
+"""
+On-disk cache of loaded animations.
+
+Entries are named by a hash of the file's path, then one of its size,
+modification time and the loader version, so an edited file or a newer
+loader misses the cache rather than getting stale data back. Writing an
+entry removes any older ones for the same path.
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from ..buffer.animation import Animation
+from ..buffer.container import AnimationWriter, open_animation
+from ..buffer.frame import Frame
+
+# Bump this whenever a loader's output changes
+VERSION = 2
+
+
+def cache_dir() -> Path:
+    """
+    Get the directory cache entries live in.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "ansi_stdio"
+
+
+def entry(path: Path) -> Path:
+    """
+    Get the cache file for the current contents of a file.
+
+    Args:
+        path: An absolute path to a file that exists
+    """
+    stat = path.stat()
+    name = _digest(str(path))
+    state = _digest(f"{stat.st_size}\0{stat.st_mtime_ns}\0{VERSION}")
+    return cache_dir() / f"{name}-{state}.anim"
+
+
+def _digest(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def read(cache_file: Path) -> Optional[Animation]:
+    """
+    Load an animation from the cache.
+
+    Returns:
+        The animation, or None if it's not cached or the entry is unreadable
+    """
+    try:
+        return open_animation(cache_file)
+    except (OSError, ValueError, struct.error, zlib.error):
+        return None  # a missing or corrupt entry is just a miss
+
+
+def write(cache_file: Path, animation: Animation):
+    """
+    Save an animation to the cache, loading all of its frames first.
+    Failing to write is not an error; the next load just parses again.
+    """
+    animation.load()
+    _save(cache_file, animation.frames)
+
+
+def _save(cache_file: Path, frames: list[Frame]):
+    """
+    Write frames to a cache file.
+    """
+    # Write to a temporary file and move it into place, so readers never
+    # see half an entry
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            with AnimationWriter(temp) as writer:
+                for frame in frames:
+                    writer.add(frame)
+            os.replace(temp, cache_file)
+        except BaseException:
+            os.unlink(temp)
+            raise
+        _prune(cache_file)
+    except OSError:
+        pass
+
+
+def _prune(cache_file: Path):
+    """
+    Remove the entries for older versions of the same file.
+    """
+    name = cache_file.name.split("-")[0]
+    for old in cache_file.parent.glob(f"{name}-*.anim"):
+        if old != cache_file:
+            old.unlink(missing_ok=True)
+
+
+def write_when_loaded(cache_file: Path, animation: Animation):
+    """
+    Save an animation to the cache once its source runs out, so a lazily
+    loaded one is cached without reading it any sooner than playback does.
+    """
+    source = animation._source
+    if source is None:
+        write(cache_file, animation)
+        return
+
+    def saving():
+        yield from source
+        _save(cache_file, animation.frames)
+
+    animation._source = saving()
@@ -0,0 +1,212 @@
+import asyncio
+import codecs
+import os
+from typing import Optional
+
+import pyte
+
+from .capture import POLL_INTERVAL, PtyReader, exit_fd, spawn
+from .info import get_terminal_size
+
+
+class AsyncCapture:
+    """
+    Capture a program's terminal output on an asyncio event loop.
+
+    Each capture just registers its file descriptors with the loop, so one
+    thread can drive as many as you like:
+
+        async for screen in AsyncCapture("top -n 1"):
+            ...
+
+    The same pyte Screen is yielded each time there's new output; updates
+    that arrive while the consumer is busy are merged into the next one.
+    """
+
+    def __init__(
+        self,
+        program: str,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        buffer_size: int = 4096,
+    ):
+        """
+        Args:
+            program (str): Command to run in the terminal
+            width (int, optional): Terminal width. Defaults to detected width.
+            height (int, optional): Terminal height. Defaults to detected height.
+            buffer_size (int, optional): Smallest read size. Grows under load.
+                Defaults to 4096.
+        """
+        if width is None or height is None:
+            detected_width, detected_height = get_terminal_size()
+            width = width or detected_width
+            height = height or detected_height
+
+        self.program = program
+        self.buffer_size = buffer_size
+        self.screen = pyte.Screen(width, height)
+        self.screen.set_mode(pyte.modes.LNM)  # Line feed/new line mode
+        self._stream = pyte.Stream(self.screen)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        self.process = None
+        self._loop = None
+        self._master_fd = None
+        self._reader = None
+        self._exited_fd = None
+        self._poller = None
+        self._changed = False  # screen changed since we last yielded it
+        self._updated = asyncio.Event()  # something happened
+        self._done = asyncio.Event()
+
+    @property
+    def started(self) -> bool:
+        return self.process is not None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    async def start(self):
+        """
+        Start the program and begin reading its output.
+        """
+        if self.started:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        width, height = self.screen.columns, self.screen.lines
+        self.process, self._master_fd = spawn(self.program, width, height)
+        self._reader = PtyReader(self._master_fd, self.buffer_size)
+        self._loop.add_reader(self._master_fd, self._on_output)
+
+        self._exited_fd = exit_fd(self.process)
+        if self._exited_fd is not None:
+            self._loop.add_reader(self._exited_fd, self._exited)
+        else:
+            self._poller = self._loop.call_later(POLL_INTERVAL, self._poll)
+
+    async def wait(self) -> pyte.Screen:
+        """
+        Run the program to the end.
+
+        Returns:
+            pyte.Screen: The final screen state
+        """
+        await self.start()
+        await self._done.wait()
+        return self.screen
+
+    async def aclose(self):
+        """
+        Stop the program if it's still running and release its resources.
+        """
+        if self.started and not self.done:
+            if self.process.poll() is None:
+                self.process.terminate()
+            self._finish()
+
+    async def __aenter__(self) -> "AsyncCapture":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def __aiter__(self):
+        return self._updates()
+
+    async def _updates(self):
+        """
+        Yield the screen whenever it changes, until the program ends.
+        Stops the program if the caller breaks out early.
+        """
+        await self.start()
+        try:
+            while True:
+                await self._updated.wait()
+                self._updated.clear()
+
+                if self._changed:
+                    self._changed = False
+                    yield self.screen
+
+                if self.done:
+                    return
+        finally:
+            await self.aclose()
+
+    def _feed(self, data: bytes, final: bool = False):
+        # Multi-byte characters can be split across reads
+        text = self._decoder.decode(data, final)
+        if not text:
+            return
+        self._stream.feed(text)
+        self._changed = True
+        self._updated.set()
+
+    def _on_output(self):
+        """
+        Called by the loop when the pty has output for us.
+        """
+        data = self._reader.drain()
+        if data:
+            self._feed(data)
+        if self._reader.closed:
+            self._finish()
+
+    def _poll(self):
+        """
+        Check on the process, for platforms without pidfd.
+        """
+        if self.process.poll() is None:
+            self._poller = self._loop.call_later(POLL_INTERVAL, self._poll)
+        else:
+            self._exited()
+
+    def _exited(self):
+        """
+        Called once the process has exited.
+        """
+        self._finish()
+        self._reap()
+
+    def _reap(self):
+        """
+        Collect the exit status and stop watching the process, once it has
+        gone. Until then the pidfd or the poller keeps calling back.
+        """
+        if self.process.poll() is None:
+            return
+
+        if self._exited_fd is not None:
+            self._loop.remove_reader(self._exited_fd)
+            os.close(self._exited_fd)
+            self._exited_fd = None
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+
+    def _finish(self):
+        """
+        Read any remaining output and clean up once the process exits.
+        """
+        if self.done:
+            return
+
+        try:
+            while data := self._reader.drain():
+                self._feed(data)
+        except OSError:
+            pass
+        self._feed(b"", final=True)
+
+        self._loop.remove_reader(self._master_fd)
+        os.close(self._master_fd)
+
+        # If the process is still going, it's reaped when it exits
+        self._reap()
+
+        self._done.set()
+        self._updated.set()
@@ -1,17 +1,160 @@
+import codecs
 import errno
 import fcntl
 import os
 import pty
+import selectors
+import shlex
 import struct
 import subprocess
 import termios
-import time
 from typing import Callable, Optional
 
 import pyte
 
 from .info import get_terminal_size
 
+# How often to check on the process when we can't get an exit notification
+POLL_INTERVAL = 0.1
+
+# Biggest single read, and most we'll read before handing data over
+MAX_READ_SIZE = 1024 * 1024
+
+
+def spawn(program: str, width: int, height: int):
+    """
+    Start a program attached to a new pseudo-terminal.
+
+    Args:
+        program (str): Command to run in the terminal
+        width (int): Terminal width
+        height (int): Terminal height
+
+    Returns:
+        tuple: (process, master_fd), with master_fd set to non-blocking
+    """
+    # Create a master/slave pty pair
+    master_fd, slave_fd = pty.openpty()
+
+    # Set the terminal size on the pty
+    term_size = struct.pack("HHHH", height, width, 0, 0)
+    fcntl.ioctl(slave_fd, termios.TIOCSWINSZ, term_size)
+
+    # Prepare environment
+    env = os.environ.copy()
+    env["TERM"] = "xterm-256color"
+    env["COLUMNS"] = str(width)
+    env["LINES"] = str(height)
+
+    # Split program command, handling quoted arguments
+    cmd_parts = shlex.split(program)
+
+    # Start the process connected to our pty
+    try:
+        process = subprocess.Popen(
+            cmd_parts,
+            stdin=slave_fd,
+            stdout=slave_fd,
+            stderr=slave_fd,
+            env=env,
+            start_new_session=True,
+            close_fds=True,
+        )
+    except OSError:
+        os.close(master_fd)
+        raise
+    finally:
+        # Close the slave side
+        os.close(slave_fd)
+
+    # Make master non-blocking for reading
+    fl = fcntl.fcntl(master_fd, fcntl.F_GETFL)
+    fcntl.fcntl(master_fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+
+    return process, master_fd
+
+
+def exit_fd(process: subprocess.Popen) -> Optional[int]:
+    """
+    Get a file descriptor that becomes readable when the process exits.
+
+    Returns:
+        A pidfd, or None if the platform doesn't support them
+    """
+    try:
+        return os.pidfd_open(process.pid)
+    except (AttributeError, OSError):
+        return None
+
+
+def read_pty(fd: int, size: int) -> Optional[bytes]:
+    """
+    Read from a non-blocking pty master.
+
+    Returns:
+        The data, b"" once the other side has gone, or None if there's
+        nothing to read right now
+    """
+    try:
+        return os.read(fd, size)
+    except OSError as e:
+        if e.errno == errno.EAGAIN:  # "resource temporarily unavailable"
+            return None
+        if e.errno == errno.EIO:  # Linux's way of saying the slave closed
+            return b""
+        raise
+
+
+class PtyReader:
+    """
+    Reads everything a pty has ready in one go.
+
+    The read size doubles while reads keep filling it, up to max_size, and
+    shrinks back when things go quiet, so chatty programs take a few big
+    reads rather than thousands of small ones.
+    """
+
+    def __init__(self, fd: int, size: int = 4096, max_size: int = MAX_READ_SIZE):
+        """
+        Args:
+            fd: Non-blocking pty master to read from
+            size: Smallest read size
+            max_size: Largest read size, and the most one drain returns
+        """
+        self.fd = fd
+        self.min_size = size
+        self.max_size = max(size, max_size)
+        self.size = size
+        self.closed = False
+
+    def drain(self) -> bytes:
+        """
+        Read until the pty has nothing more for us right now.
+
+        Returns:
+            All the data read, b"" if there was none. Sets `closed` once
+            the other side has gone.
+        """
+        chunks = []
+        total = 0
+        while total < self.max_size:
+            data = read_pty(self.fd, self.size)
+            if data is None:
+                break
+            if not data:
+                self.closed = True
+                break
+
+            chunks.append(data)
+            total += len(data)
+            if len(data) == self.size:
+                self.size = min(self.size * 2, self.max_size)
+
+        if total < self.size // 4:
+            self.size = max(self.size // 2, self.min_size)
+
+        return b"".join(chunks)
+
 
 def capture_terminal(
     program: str,
@@ -23,13 +166,18 @@ def capture_terminal(
     """
     Capture terminal output for a given program with flexible processing.
 
+    Sleeps in the kernel until there's output or the program exits, so
+    output is handled as soon as it arrives and waiting costs nothing.
+
     Args:
         program (str): Command to run in the terminal
         width (int, optional): Terminal width. Defaults to detected width.
         height (int, optional): Terminal height. Defaults to detected height.
-        buffer_size (int, optional): Size of read buffer. Defaults to 4096.
+        buffer_size (int, optional): Smallest read size. Grows under load.
+            Defaults to 4096.
         display_callback (Callable, optional): Function to process screen state.
-            Receives the pyte Screen object for custom handling.
+            Receives the pyte Screen object for custom handling. Called once
+            per batch of output rather than once per read.
 
     Returns:
         pyte.Screen: The final screen state after program execution
@@ -48,89 +196,78 @@ def capture_terminal(
     # Configure screen options
     screen.set_mode(pyte.modes.LNM)  # Line feed/new line mode
 
-    # Prepare program execution
-    try:
-        # Create a master/slave pty pair
-        master_fd, slave_fd = pty.openpty()
-
-        # Set the terminal size on the pty
-        term_size = struct.pack("HHHH", height, width, 0, 0)
-        fcntl.ioctl(slave_fd, termios.TIOCSWINSZ, term_size)
+    # Multi-byte characters can be split across reads
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
 
-        # Prepare environment
-        env = os.environ.copy()
-        env["TERM"] = "xterm-256color"
-        env["COLUMNS"] = str(width)
-        env["LINES"] = str(height)
+    def feed(data, final=False):
+        text = decoder.decode(data, final)
+        if not text:
+            return
+        stream.feed(text)
 
-        # Split program command, handling quoted arguments
-        try:
-            import shlex
+        # Call display callback if provided
+        if display_callback:
+            display_callback(screen)
 
-            cmd_parts = shlex.split(program) if " " in program else program.split()
-        except ImportError:
-            cmd_parts = program.split()
-
-        # Start the process connected to our pty
-        process = subprocess.Popen(
-            cmd_parts,
-            stdin=slave_fd,
-            stdout=slave_fd,
-            stderr=slave_fd,
-            env=env,
-            start_new_session=True,
-            close_fds=True,
-        )
+    try:
+        process, master_fd = spawn(program, width, height)
+    except (KeyboardInterrupt, ImportError, OSError) as e:
+        _report(e)
+        return screen
 
-        # Close the slave side
-        os.close(slave_fd)
+    reader = PtyReader(master_fd, buffer_size)
+    exited_fd = exit_fd(process)
+    selector = selectors.DefaultSelector()
+    selector.register(master_fd, selectors.EVENT_READ)
+    if exited_fd is not None:
+        selector.register(exited_fd, selectors.EVENT_READ)
+    timeout = None if exited_fd is not None else POLL_INTERVAL
 
-        # Make master non-blocking for reading
-        fl = fcntl.fcntl(master_fd, fcntl.F_GETFL)
-        fcntl.fcntl(master_fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+    try:
+        # Wait for output or for the process to exit
+        running = True
+        while running:
+            for key, _ in selector.select(timeout):
+                if key.fd == exited_fd:
+                    running = False
+                    continue
 
-        # Read loop
-        while process.poll() is None:  # While process is running
-            try:
-                data = os.read(master_fd, buffer_size)
+                data = reader.drain()
                 if data:
-                    text_data = data.decode("utf-8", errors="replace")
-                    stream.feed(text_data)
-
-                    # Call display callback if provided
-                    if display_callback:
-                        display_callback(screen)
-                else:
-                    time.sleep(0.01)  # Short sleep to prevent CPU hogging
-            except (IOError, OSError) as e:
-                if e.errno != errno.EAGAIN:  # Not "resource temporarily unavailable"
-                    raise
-                time.sleep(0.01)  # No data ready, short sleep
+                    feed(data)
+                if reader.closed:
+                    running = False
+
+            if exited_fd is None and process.poll() is not None:
+                running = False
 
         # Process exited, read any remaining output
-        try:
-            while True:
-                data = os.read(master_fd, buffer_size)
-                if not data:
-                    break
-                text_data = data.decode("utf-8", errors="replace")
-                stream.feed(text_data)
-
-                # Final display callback
-                if display_callback:
-                    display_callback(screen)
-        except (IOError, OSError):
-            pass
+        while data := reader.drain():
+            feed(data)
+        feed(b"", final=True)
 
-        # Clean up
-        os.close(master_fd)
+        process.wait()
 
     except (KeyboardInterrupt, ImportError, OSError) as e:
-        if isinstance(e, ImportError):
-            print(f"Error: pty module not available - {e}")
-        elif isinstance(e, OSError):
-            print(f"\nError running program: {e}")
-        else:
-            print("\nProgram terminated")
+        _report(e)
+
+    finally:
+        # Clean up
+        selector.close()
+        if exited_fd is not None:
+            os.close(exited_fd)
+        os.close(master_fd)
 
     return screen
+
+
+def _report(e: BaseException):
+    """
+    Tell the user why the capture stopped.
+    """
+    if isinstance(e, ImportError):
+        print(f"Error: pty module not available - {e}")
+    elif isinstance(e, OSError):
+        print(f"\nError running program: {e}")
+    else:
+        print("\nProgram terminated")
@@ -0,0 +1,124 @@
+"""
+Converts pyte screens to buffers.
+
+Characters are grouped into runs of the same attributes, and each run is
+written with a single set_row, so a screen costs one write per style change
+rather than one per cell.
+"""
+
+from functools import lru_cache
+from itertools import groupby
+from operator import attrgetter, itemgetter
+from typing import Optional
+
+import pyte
+from rich.color import Color, ColorParseError
+from rich.style import Style
+
+from ..buffer.buffer import Buffer
+from ..buffer.dense import DenseBuffer
+from .render import FG_COLORS
+
+_attributes = itemgetter(slice(1, None))  # a Char's attributes, after the data
+_data = attrgetter("data")
+
+
+def _color(color) -> Optional[Color]:
+    """
+    Convert one of pyte's colors to a rich Color, or None for the default.
+    """
+    if color == "default":
+        return None
+    code = FG_COLORS.get(color)
+    if code is not None:
+        index = int(code)
+        return Color.from_ansi(index - 30 if index < 90 else index - 82)
+    try:
+        return Color.parse(f"#{color}")
+    except ColorParseError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def attribute_style(attributes) -> Optional[Style]:
+    """
+    Get the rich Style for a tuple of pyte character attributes.
+    Memoized, so each distinct set of attributes maps to one Style object
+    and interns to the same id in the style table.
+
+    Args:
+        attributes: (fg, bg, bold, italics, underscore, strikethrough,
+            reverse, blink), as in pyte's Char after the data field
+
+    Returns:
+        Style: The style, or None for the default style
+    """
+    fg, bg, bold, italics, underscore, strikethrough, reverse, blink = attributes
+    style = Style(
+        color=_color(fg),
+        bgcolor=_color(bg),
+        bold=bold or None,
+        italic=italics or None,
+        underline=underscore or None,
+        strike=strikethrough or None,
+        reverse=reverse or None,
+        blink=blink or None,
+    )
+    return style or None
+
+
+def screen_to_buffer(
+    screen: pyte.Screen,
+    buffer: Optional[Buffer] = None,
+    dirty_only: bool = False,
+    clear_dirty: bool = True,
+) -> Buffer:
+    """
+    Copy a pyte screen into a buffer, blanks included.
+
+    Keep passing the same buffer with dirty_only=True and it follows the
+    screen for the cost of the lines that changed. The right half of a
+    wide character is left empty.
+
+    Args:
+        screen: A pyte.Screen instance
+        buffer: Buffer to write into. Defaults to a new DenseBuffer.
+        dirty_only: If True, only copy the lines pyte marked as dirty
+        clear_dirty: Whether to clear the dirty set after processing
+
+    Returns:
+        Buffer: The buffer that was written to
+    """
+    reused = buffer is not None
+    if not reused:
+        buffer = DenseBuffer()
+        dirty_only = False
+
+    lines = sorted(screen.dirty) if dirty_only else range(screen.lines)
+    columns = range(screen.columns)
+
+    for y in lines:
+        if y >= screen.lines:
+            continue
+        chars = map(screen.buffer[y].__getitem__, columns)
+
+        x = 0
+        for attributes, run in groupby(chars, _attributes):
+            data = list(map(_data, run))
+            style = attribute_style(attributes)
+
+            if all(len(char) == 1 for char in data):
+                buffer.set_row(x, y, "".join(data), style)
+            else:
+                # Wide or combining characters, which don't fit one per cell
+                for i, char in enumerate(data):
+                    if char:
+                        buffer.set_row(x + i, y, char[0], style)
+                    elif reused:
+                        del buffer[x + i, y]
+            x += len(data)
+
+    if clear_dirty:
+        screen.dirty.clear()
+
+    return buffer
@@ -0,0 +1,172 @@
+"""
+Records pyte screens into animations.
+
+Each update becomes a DeltaFrame holding just the cells that changed, so a
+long session costs memory in proportion to how much happens on screen
+rather than its size times the number of frames.
+"""
+
+from typing import Optional
+
+import pyte
+
+from ..buffer.animation import Animation
+from ..buffer.container import AnimationWriter
+from ..buffer.dense import DenseBuffer
+from ..buffer.frame import DeltaFrame, Frame, KeyFrame
+from ..core.clock import Clock, wall
+from .capture import capture_terminal
+from .convert import attribute_style
+
+
+class Recorder:
+    """
+    Turns the lines pyte marks as dirty into frames of an animation.
+
+    Pass `record` as capture_terminal's display_callback, or call it
+    yourself whenever the screen has changed.
+    """
+
+    def __init__(
+        self,
+        animation: Optional[Animation] = None,
+        clock: Clock = wall,
+        writer: Optional[AnimationWriter] = None,
+    ):
+        """
+        Args:
+            animation: Where to add frames. Defaults to a new Animation.
+            clock: Where frame times come from
+            writer: Also stream frames to a file as they're recorded.
+                Closing it is up to the caller, after `finish`.
+        """
+        self.animation = animation if animation is not None else Animation()
+        self.clock = clock
+        self.writer = writer
+        self._rows = {}  # {y: [Char, ...]} as last recorded
+        self._size = None  # (columns, lines) of the last screen
+        self._frame: Optional[Frame] = None  # last frame added
+        self._started = 0.0  # clock time of the last frame
+
+    def record(self, screen: pyte.Screen, clear_dirty: bool = True) -> Optional[Frame]:
+        """
+        Add a frame with whatever changed on the screen's dirty lines.
+
+        Args:
+            screen: A pyte.Screen instance
+            clear_dirty: Whether to clear the dirty set after recording
+
+        Returns:
+            The frame that was added, or None if nothing changed
+        """
+        frame = self.diff(screen, clear_dirty)
+        if frame is None:
+            return None
+        return self._add(frame)
+
+    __call__ = record
+
+    def diff(self, screen: pyte.Screen, clear_dirty: bool = True) -> Optional[Frame]:
+        """
+        Build a frame of what changed on the screen since the last one,
+        without adding it to the animation.
+
+        The first frame, and the first after a resize, is a KeyFrame of the
+        whole screen. Frames start with a duration of 0.
+
+        Args:
+            screen: A pyte.Screen instance
+            clear_dirty: Whether to clear the dirty set afterwards
+
+        Returns:
+            The new frame, or None if nothing changed
+        """
+        size = (screen.columns, screen.lines)
+        if size != self._size:
+            self._rows = {}
+            self._size = size
+            lines = range(screen.lines)
+        else:
+            lines = sorted(screen.dirty)
+
+        keyframe = not self._rows
+        blank = screen.default_char
+        buffer = DenseBuffer()
+        width = screen.columns
+
+        for y in lines:
+            if y >= screen.lines:
+                continue
+            row = screen.buffer[y]
+            chars = [row[x] for x in range(width)]
+            previous = self._rows.get(y)
+            self._rows[y] = chars
+
+            for x, char in enumerate(chars):
+                if previous is None:
+                    if char == blank:
+                        continue
+                elif previous[x] == char:
+                    continue
+                data = char.data
+                if not data:
+                    if previous is None:
+                        # Right half of a wide character
+                        continue
+                    # Blank out whatever the wide character was drawn over
+                    data = " "
+                buffer.set_row(x, y, data[0], attribute_style(char[1:]))
+
+        if clear_dirty:
+            screen.dirty.clear()
+
+        if not keyframe and not len(buffer):
+            return None
+
+        return KeyFrame(buffer, 0.0) if keyframe else DeltaFrame(buffer, 0.0)
+
+    def finish(self):
+        """
+        End the last frame now.
+        """
+        if self._frame is not None:
+            self._frame.duration = self.clock.time - self._started
+
+    def _add(self, frame: Frame) -> Frame:
+        """
+        Add a frame, ending the previous one at the current time.
+        """
+        now = self.clock.time
+        if self._frame is not None:
+            self._frame.duration = now - self._started
+        self._frame = self.animation.add(frame)
+        self._started = now
+        if self.writer is not None:
+            self.writer.add(self._frame)
+        return self._frame
+
+
+def record_terminal(
+    program: str,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    buffer_size: int = 4096,
+    clock: Clock = wall,
+) -> Animation:
+    """
+    Run a program and record its terminal output as an animation.
+
+    Args:
+        program (str): Command to run in the terminal
+        width (int, optional): Terminal width. Defaults to detected width.
+        height (int, optional): Terminal height. Defaults to detected height.
+        buffer_size (int, optional): Smallest read size. Defaults to 4096.
+        clock (Clock, optional): Where frame times come from
+
+    Returns:
+        Animation: A KeyFrame of the first screen, then a DeltaFrame per update
+    """
+    recorder = Recorder(clock=clock)
+    capture_terminal(program, width, height, buffer_size, recorder.record)
+    recorder.finish()
+    return recorder.animation
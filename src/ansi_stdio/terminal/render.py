@@ -3,6 +3,11 @@ Pyte screen renderer for ANSI stdio.
 Converts pyte screen state to formatted strings with ANSI escape sequences.
 """
 
+import sys
+from functools import lru_cache
+
+from wcwidth import wcswidth
+
 # Build color maps once at module import
 FG_COLORS = {
     "black": "30",
@@ -46,99 +51,282 @@ BG_COLORS = {
 try:
     from pyte import graphics
 
-    if hasattr(graphics, "FG"):
-        FG_COLORS.update({k.lower(): v for k, v in graphics.FG.items()})
-    if hasattr(graphics, "BG"):
-        BG_COLORS.update({k.lower(): v for k, v in graphics.BG.items()})
+    for table in ("FG_ANSI", "FG_AIXTERM"):
+        FG_COLORS.update({v: str(k) for k, v in getattr(graphics, table).items()})
+    for table in ("BG_ANSI", "BG_AIXTERM"):
+        BG_COLORS.update({v: str(k) for k, v in getattr(graphics, table).items()})
 except (ImportError, AttributeError):
     pass
 
+# Color modes, from most to fewest colors
+TRUECOLOR = "truecolor"
+COLORS_256 = "256"
+COLORS_16 = "16"
+COLOR_MODES = (TRUECOLOR, COLORS_256, COLORS_16)
+
+# The xterm 256 color palette: 16 system colors, a 6x6x6 cube and a gray ramp
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+PALETTE = (
+    [
+        (0x00, 0x00, 0x00),
+        (0xCD, 0x00, 0x00),
+        (0x00, 0xCD, 0x00),
+        (0xCD, 0xCD, 0x00),
+        (0x00, 0x00, 0xEE),
+        (0xCD, 0x00, 0xCD),
+        (0x00, 0xCD, 0xCD),
+        (0xE5, 0xE5, 0xE5),
+        (0x7F, 0x7F, 0x7F),
+        (0xFF, 0x00, 0x00),
+        (0x00, 0xFF, 0x00),
+        (0xFF, 0xFF, 0x00),
+        (0x5C, 0x5C, 0xFF),
+        (0xFF, 0x00, 0xFF),
+        (0x00, 0xFF, 0xFF),
+        (0xFF, 0xFF, 0xFF),
+    ]
+    + [(r, g, b) for r in CUBE_LEVELS for g in CUBE_LEVELS for b in CUBE_LEVELS]
+    + [(8 + 10 * i,) * 3 for i in range(24)]
+)
+PALETTE_INDEX = {}
+for index, rgb in enumerate(PALETTE):
+    PALETTE_INDEX.setdefault(rgb, index)
+
+
+def _distance(a, b):
+    """
+    Squared distance between two (r, g, b) colors.
+    """
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
 
-def format_char(char):
+def _cube_level(value):
     """
-    Format a single character with its attributes.
+    Index of the nearest level in the 6x6x6 color cube for one channel.
+    """
+    if value < 48:
+        return 0
+    if value < 115:
+        return 1
+    return min(5, (value - 35) // 40)
+
+
+def nearest_256(rgb):
+    """
+    Find the closest color in the 256 color palette.
+
+    Args:
+        rgb: A (r, g, b) tuple
+
+    Returns:
+        int: The palette index
+    """
+    exact = PALETTE_INDEX.get(rgb)
+    if exact is not None:
+        return exact
+
+    r, g, b = rgb
+    cube = 16 + 36 * _cube_level(r) + 6 * _cube_level(g) + _cube_level(b)
+    gray = 232 + min(23, max(0, round(((r + g + b) / 3 - 8) / 10)))
+
+    return min(cube, gray, key=lambda index: _distance(PALETTE[index], rgb))
+
+
+def nearest_16(rgb):
+    """
+    Find the closest of the 16 system colors.
+
+    Args:
+        rgb: A (r, g, b) tuple
+
+    Returns:
+        int: The palette index, 0-15
+    """
+    return min(range(16), key=lambda index: _distance(PALETTE[index], rgb))
+
+
+def _rgb(color):
+    """
+    Parse one of pyte's hex color strings, or return None.
+    """
+    if len(color) != 6:
+        return None
+    try:
+        value = int(color, 16)
+    except ValueError:
+        return None
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+@lru_cache(maxsize=4096)
+def color_code(color, background=False, colors=TRUECOLOR):
+    """
+    Get the SGR parameters for a pyte color.
+
+    Args:
+        color: A color name, a hex string like "ff8700" or a palette index
+        background: True for a background color
+        colors: One of COLOR_MODES. Colors are reduced to fit.
+
+    Returns:
+        str: The SGR parameters, e.g. "31", "38;5;208" or "38;2;255;135;0"
+    """
+    names = BG_COLORS if background else FG_COLORS
+    default = "49" if background else "39"
+
+    if isinstance(color, int):
+        index = color % 256
+    else:
+        name = color.lower()
+        if name in names:
+            return names[name]
+
+        rgb = _rgb(name)
+        if rgb is None:
+            return default
+        if colors == TRUECOLOR:
+            return f"{48 if background else 38};2;{rgb[0]};{rgb[1]};{rgb[2]}"
+        index = nearest_256(rgb)
+
+    if colors == COLORS_16 and index >= 16:
+        index = nearest_16(PALETTE[index])
+
+    if index < 8:
+        return str((40 if background else 30) + index)
+    if index < 16:
+        return str((100 if background else 90) + index - 8)
+    return f"{48 if background else 38};5;{index}"
+
+
+def style_codes(char, colors=TRUECOLOR):
+    """
+    Get the SGR parameters for a character's attributes.
 
     Args:
         char: A pyte character with attributes
+        colors: One of COLOR_MODES
 
     Returns:
-        str: The formatted character with ANSI codes
+        str: The parameters joined with ";", or "" for the default style
+    """
+    return attribute_codes(char[1:], colors)
+
+
+@lru_cache(maxsize=4096)
+def attribute_codes(attributes, colors=TRUECOLOR):
     """
+    Get the SGR parameters for a tuple of pyte character attributes.
+    Memoized, since screens tend to reuse a handful of styles.
+
+    Args:
+        attributes: (fg, bg, bold, italics, underscore, strikethrough,
+            reverse, blink), as in pyte's Char after the data field
+        colors: One of COLOR_MODES
+
+    Returns:
+        str: The parameters joined with ";", or "" for the default style
+    """
+    fg, bg, bold, italics, underscore, strikethrough, reverse, blink = attributes
+
     # Build ANSI style codes
     codes = []
 
     # Text attributes
-    if char.bold:
+    if bold:
         codes.append("1")
-    if char.italics:
+    if italics:
         codes.append("3")
-    if char.underscore:
+    if underscore:
         codes.append("4")
-    if char.blink:
+    if blink:
         codes.append("5")
-    if char.reverse:
+    if reverse:
         codes.append("7")
+    if strikethrough:
+        codes.append("9")
 
-    # Foreground color
-    if char.fg != "default":
-        # Get the closest ANSI color code
-        fg_code = "39"  # Default foreground
+    # Colors
+    if fg != "default":
+        codes.append(color_code(fg, False, colors))
+    if bg != "default":
+        codes.append(color_code(bg, True, colors))
 
-        if isinstance(char.fg, str):
-            color_name = char.fg.lower()
-            fg_code = FG_COLORS.get(color_name, "39")
-        elif isinstance(char.fg, int):
-            # Assume it's a direct color index
-            fg_code = str(30 + (char.fg % 8))
+    return ";".join(codes)
 
-        codes.append(fg_code)
 
-    # Background color
-    if char.bg != "default":
-        # Get the closest ANSI color code
-        bg_code = "49"  # Default background
+def format_char(char, colors=TRUECOLOR):
+    """
+    Format a single character with its attributes.
 
-        if isinstance(char.bg, str):
-            color_name = char.bg.lower()
-            bg_code = BG_COLORS.get(color_name, "49")
-        elif isinstance(char.bg, int):
-            # Assume it's a direct color index
-            bg_code = str(40 + (char.bg % 8))
+    Args:
+        char: A pyte character with attributes
+        colors: One of COLOR_MODES
 
-        codes.append(bg_code)
+    Returns:
+        str: The formatted character with ANSI codes
+    """
+    codes = style_codes(char, colors)
 
     # Construct full ANSI code if we have any style attributes
     if codes:
-        return f"\033[{';'.join(codes)}m{char.data}\033[0m"
+        return f"\033[{codes}m{char.data}\033[0m"
     else:
         return char.data
 
 
-def format_line(row, width):
+def format_line(row, width, colors=TRUECOLOR):
     """
     Format a single line of the screen.
 
+    Consecutive characters with the same attributes are grouped into one
+    span, so each style change costs one escape sequence.
+
     Args:
         row: A dictionary of column -> character mappings
         width: The width of the screen
+        colors: One of COLOR_MODES
 
     Returns:
         str: The formatted line
     """
     line = []
+    attributes = None  # attributes of the current span
+    codes = ""  # SGR parameters of the current span
 
-    # Build the line character by character
     for x in range(width):
-        if x in row and row[x].data:
-            line.append(format_char(row[x]))
-        else:
+        char = row.get(x)
+        if char is None:
             # Empty cell
-            line.append(" ")
+            data, current = " ", None
+        elif not char.data:
+            left = row.get(x - 1)
+            if left is not None and wcswidth(left.data) == 2:
+                # Right half of a wide character
+                continue
+            # Left behind when the wide character was overwritten
+            data, current = " ", None
+        else:
+            data, current = char.data, char[1:]
+
+        if current != attributes:
+            attributes = current
+            new_codes = attribute_codes(current, colors) if current else ""
+            if new_codes != codes:
+                if codes:
+                    line.append("\033[0m")
+                if new_codes:
+                    line.append(f"\033[{new_codes}m")
+                codes = new_codes
+
+        line.append(data)
+
+    if codes:
+        line.append("\033[0m")
 
     return "".join(line)
 
 
-def render_screen(screen, dirty_only=False, clear_dirty=True):
+def render_screen(screen, dirty_only=False, clear_dirty=True, colors=TRUECOLOR):
     """
     Convert a pyte screen to a dictionary of formatted strings.
 
@@ -146,6 +334,7 @@ def render_screen(screen, dirty_only=False, clear_dirty=True):
         screen: A pyte.Screen instance
         dirty_only: If True, only render dirty lines
         clear_dirty: Whether to clear the dirty set after processing
+        colors: One of COLOR_MODES
 
     Returns:
         dict: A dictionary mapping line numbers to formatted strings
@@ -161,7 +350,7 @@ def render_screen(screen, dirty_only=False, clear_dirty=True):
     # Build the screen line by line
     for y in lines_to_process:
         if y in screen.buffer:
-            formatted_lines[y] = format_line(screen.buffer[y], width)
+            formatted_lines[y] = format_line(screen.buffer[y], width, colors)
         else:
             # Empty line
             formatted_lines[y] = " " * width
@@ -173,7 +362,7 @@ def render_screen(screen, dirty_only=False, clear_dirty=True):
     return formatted_lines
 
 
-def display_screen(screen, dirty_only=False, clear_dirty=True):
+def display_screen(screen, dirty_only=False, clear_dirty=True, colors=TRUECOLOR):
     """
     Display a pyte screen using ANSI escape sequences.
 
@@ -181,15 +370,20 @@ def display_screen(screen, dirty_only=False, clear_dirty=True):
         screen: A pyte.Screen instance
         dirty_only: If True, only display dirty lines
         clear_dirty: Whether to clear the dirty set after processing
+        colors: One of COLOR_MODES
     """
     # Get formatted lines
-    formatted_lines = render_screen(screen, dirty_only, clear_dirty)
+    formatted_lines = render_screen(screen, dirty_only, clear_dirty, colors)
 
+    output = []
     if not dirty_only:
         # Start fresh - move to home position and clear screen
-        print("\033[H\033[J", end="", flush=True)
+        output.append("\033[H\033[J")
 
-    # Print each line with proper cursor positioning
+    # Position the cursor at the start of each line
     for y, line in formatted_lines.items():
-        # Position cursor at the start of the line
-        print(f"\033[{y+1};1H{line}", end="", flush=True)
+        output.append(f"\033[{y+1};1H{line}")
+
+    # One write per frame rather than one per line
+    sys.stdout.write("".join(output))
+    sys.stdout.flush()
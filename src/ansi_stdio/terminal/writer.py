@@ -0,0 +1,151 @@
+"""
+Diffing terminal output for pyte screens.
+
+Remembers what is already on the terminal and only sends the cells that
+changed, with as few cursor moves and SGR sequences as it can get away with.
+"""
+
+import sys
+
+from wcwidth import wcswidth
+
+from .render import TRUECOLOR, style_codes
+
+
+class ScreenWriter:
+    """
+    Writes pyte screens to a terminal, sending only what changed.
+    """
+
+    def __init__(self, stream=None, colors=TRUECOLOR):
+        """
+        Initialize the writer.
+
+        Args:
+            stream: Where to write to. Defaults to sys.stdout.
+            colors: One of render.COLOR_MODES
+        """
+        self.stream = stream or sys.stdout
+        self.colors = colors
+        self.reset()
+
+    def reset(self):
+        """
+        Forget what's on the terminal, so the next write repaints it all.
+        """
+        self._rows = {}  # {y: [Char, ...]} as last written
+        self._size = None  # (columns, lines) of the last screen
+        self._sgr = None  # current SGR parameters, None if unknown
+        self._cursor = None  # (x, y) of the terminal cursor, None if unknown
+
+    def write(self, screen, dirty_only=False, clear_dirty=True):
+        """
+        Write the changes in a screen to the stream in one go.
+
+        Args:
+            screen: A pyte.Screen instance
+            dirty_only: If True, only diff the lines pyte marked as dirty
+            clear_dirty: Whether to clear the dirty set after processing
+        """
+        output = self.render(screen, dirty_only, clear_dirty)
+        if output:
+            self.stream.write(output)
+            self.stream.flush()
+
+    def render(self, screen, dirty_only=False, clear_dirty=True):
+        """
+        Build the escape sequences needed to update the terminal.
+
+        Args:
+            screen: A pyte.Screen instance
+            dirty_only: If True, only diff the lines pyte marked as dirty
+            clear_dirty: Whether to clear the dirty set after processing
+
+        Returns:
+            str: The output for this frame, "" if nothing changed
+        """
+        out = []
+
+        size = (screen.columns, screen.lines)
+        if size != self._size:
+            self.reset()
+            self._size = size
+            out.append("\033[0m\033[H\033[2J")
+            self._sgr = ""
+            self._cursor = (0, 0)
+
+        if dirty_only and self._rows:
+            lines = sorted(screen.dirty)
+        else:
+            lines = range(screen.lines)
+
+        width = screen.columns
+        for y in lines:
+            if y >= screen.lines:
+                continue
+            row = screen.buffer[y]
+            chars = [row[x] for x in range(width)]
+            self._diff_row(out, y, chars, self._rows.get(y))
+            self._rows[y] = chars
+
+        cursor = (screen.cursor.x, screen.cursor.y)
+        if out and cursor != self._cursor:
+            out.append(self._move(*cursor))
+            self._cursor = cursor
+
+        if clear_dirty:
+            screen.dirty.clear()
+
+        return "".join(out)
+
+    def _diff_row(self, out, y, chars, previous):
+        """
+        Append the output needed to turn `previous` into `chars` on line y.
+        """
+        for x, char in enumerate(chars):
+            data = char.data
+            if not data:
+                if x and wcswidth(chars[x - 1].data) == 2:
+                    # Right half of a wide character, drawn along with the left
+                    continue
+                # pyte leaves these behind when the left half is overwritten,
+                # so blank it if either half changed
+                if (
+                    previous is not None
+                    and previous[x] == char
+                    and (not x or previous[x - 1] == chars[x - 1])
+                ):
+                    continue
+                data = " "
+            elif previous is not None and previous[x] == char:
+                continue
+
+            if self._cursor != (x, y):
+                out.append(self._move(x, y))
+
+            sgr = style_codes(char, self.colors)
+            if sgr != self._sgr:
+                out.append(f"\033[0;{sgr}m" if sgr else "\033[0m")
+                self._sgr = sgr
+
+            out.append(data)
+            self._cursor = (x + max(wcswidth(data), 1), y)
+
+    def _move(self, x, y):
+        """
+        Get the shortest sequence that moves the cursor to x, y.
+        """
+        if self._cursor is not None:
+            cursor_x, cursor_y = self._cursor
+            if cursor_y == y and cursor_x < x:
+                return f"\033[{x - cursor_x}C"
+        return f"\033[{y + 1};{x + 1}H"
+
+    def close(self):
+        """
+        Put the terminal's style back to normal.
+        """
+        if self._sgr:
+            self.stream.write("\033[0m")
+            self.stream.flush()
+        self._sgr = ""
@@ -0,0 +1,268 @@
+from rich.segment import Segment
+
+from ansi_stdio.buffer.animation import Animation
+from ansi_stdio.buffer.buffer import Buffer
+from ansi_stdio.buffer.frame import DeltaFrame, KeyFrame
+
+
+def keyframe(text, duration=1.0):
+    buffer = Buffer()
+    buffer[0, 0] = Segment(text)
+    return KeyFrame(buffer, duration)
+
+
+def test_render_empty():
+    assert len(Animation().render(0)) == 0
+
+
+def test_find():
+    anim = Animation()
+    for text in "ABC":
+        anim.add(keyframe(text))
+
+    assert anim.find(-0.5) == -1
+    assert anim.find(0) == 0
+    assert anim.find(1.5) == 1
+    assert anim.find(100) == 2
+
+
+def test_render_keyframes():
+    anim = Animation()
+    for text in "ABC":
+        anim.add(keyframe(text))
+
+    assert anim.render(0.5)[0, 0].text == "A"
+    assert anim.render(1.0)[0, 0].text == "B"
+    assert anim.render(2.9)[0, 0].text == "C"
+    assert len(anim.render(-1)) == 0
+
+
+def test_index_is_incremental():
+    anim = Animation()
+    anim.add(keyframe("A"))
+    anim.find(0)
+    assert anim._times == [0.0]
+
+    anim.add(keyframe("B"))
+    assert anim.find(1.5) == 1
+    assert anim._times == [0.0, 1.0]
+
+
+def test_duration_change_invalidates_index():
+    anim = Animation()
+    for text in "ABC":
+        anim.add(keyframe(text))
+    assert anim.find(1.5) == 1
+
+    anim.frames[0].duration = 2.0
+    assert anim._times == []
+    assert anim.find(1.5) == 0
+    assert anim.find(2.5) == 1
+    assert anim.find(3.5) == 2
+
+    anim.frames[1].duration = 0.5
+    assert anim._times == [0.0]
+    assert anim.find(2.6) == 2
+
+
+def deltaframe(x, text, duration=1.0):
+    buffer = Buffer()
+    buffer[x, 0] = Segment(text)
+    return DeltaFrame(buffer, duration)
+
+
+def test_render_replays_deltas_from_keyframe():
+    anim = Animation()
+    anim.add(keyframe("A"))
+    anim.add(deltaframe(1, "B"))
+    anim.add(deltaframe(2, "C"))
+
+    buffer = anim.render(2.5)
+    assert buffer[0, 0].text == "A"
+    assert buffer[1, 0].text == "B"
+    assert buffer[2, 0].text == "C"
+    assert len(anim.render(1.5)) == 2
+
+
+def test_render_starts_at_nearest_keyframe():
+    anim = Animation()
+    anim.add(keyframe("A"))
+    anim.add(deltaframe(1, "B"))
+    anim.add(keyframe("C"))
+    anim.add(deltaframe(1, "D"))
+
+    assert anim._keyframes == [0, 2]
+    assert anim.keyframe(3) == 2
+    assert anim.keyframe(1) == 0
+
+    buffer = anim.render(3.5)
+    assert buffer[0, 0].text == "C"
+    assert buffer[1, 0].text == "D"
+    assert len(buffer) == 2
+
+
+def test_render_without_keyframe():
+    anim = Animation()
+    anim.add(deltaframe(0, "A"))
+    anim.add(deltaframe(1, "B"))
+
+    assert anim.keyframe(1) == 0
+    assert len(anim.render(1.5)) == 2
+
+
+def test_promote_every_n_frames():
+    anim = Animation(keyframe_every=2)
+    anim.add(keyframe("A"))
+    anim.add(deltaframe(1, "B"))
+    added = anim.add(deltaframe(2, "C"))
+
+    assert isinstance(added, KeyFrame)
+    assert anim.frames[2] is added
+    assert anim._keyframes == [0, 2]
+    assert len(added.buffer) == 3
+    assert added.time == 2.0
+
+    buffer = anim.render(2.5)
+    assert buffer[2, 0].text == "C"
+    assert len(buffer) == 3
+
+
+def test_promote_after_n_cells():
+    anim = Animation(keyframe_cells=4)
+    anim.add(keyframe("A"))
+    anim.add(deltaframe(1, "BB"))
+    assert isinstance(anim.add(deltaframe(3, "C")), DeltaFrame)
+    assert isinstance(anim.add(deltaframe(4, "D")), KeyFrame)
+    assert isinstance(anim.add(deltaframe(5, "E")), DeltaFrame)
+
+    assert anim.render(10)[5, 0].text == "E"
+
+
+def test_render_cache_is_bounded():
+    anim = Animation(cache_entries=2)
+    for text in "ABCD":
+        anim.add(keyframe(text))
+
+    for t in range(4):
+        anim.render(t)
+    assert len(anim.cache) == 2
+    assert anim.cache.evictions == 2
+
+    anim.render(3)
+    assert anim.cache.hits == 1
+
+
+def test_render_cache_returns_copies():
+    anim = Animation()
+    anim.add(keyframe("A"))
+
+    first = anim.render(0)
+    first[5, 5] = Segment("X")
+    assert anim.render(0)[5, 5] is None
+
+
+def test_cursor_plays_forward():
+    anim = Animation()
+    anim.add(keyframe("A"))
+    for x in range(1, 5):
+        anim.add(deltaframe(x, str(x)))
+
+    cursor = anim.cursor()
+    assert len(cursor.render(-1)) == 0
+    assert len(cursor.render(0)) == 1
+    assert cursor.index == 0
+
+    buffer = cursor.render(2.5)
+    assert cursor.index == 2
+    assert buffer[2, 0].text == "2"
+    assert buffer[3, 0] is None
+
+    buffer = cursor.render(4)
+    assert buffer[4, 0].text == "4"
+    assert len(buffer) == 5
+
+
+def test_cursor_applies_only_new_frames(monkeypatch):
+    anim = Animation()
+    anim.add(keyframe("A"))
+    anim.add(deltaframe(1, "B"))
+    anim.add(deltaframe(2, "C"))
+
+    cursor = anim.cursor()
+    cursor.render(1)
+
+    def fail(index):
+        raise AssertionError("should not replay")
+
+    monkeypatch.setattr(anim, "_replay", fail)
+    assert cursor.render(2)[2, 0].text == "C"
+
+
+def test_cursor_seeks_backwards():
+    anim = Animation()
+    anim.add(keyframe("A"))
+    anim.add(deltaframe(1, "B"))
+    anim.add(deltaframe(2, "C"))
+
+    cursor = anim.cursor()
+    cursor.render(2)
+    buffer = cursor.render(1)
+    assert buffer[1, 0].text == "B"
+    assert buffer[2, 0] is None
+
+
+def test_cursor_jumps_to_keyframe():
+    anim = Animation()
+    anim.add(keyframe("A"))
+    anim.add(deltaframe(1, "B"))
+    anim.add(keyframe("C"))
+
+    cursor = anim.cursor()
+    cursor.render(0)
+    buffer = cursor.render(2)
+    assert buffer[0, 0].text == "C"
+    assert len(buffer) == 1
+
+
+def test_cursor_result_is_a_copy():
+    anim = Animation()
+    anim.add(keyframe("A"))
+    anim.add(deltaframe(1, "B"))
+
+    cursor = anim.cursor()
+    buffer = cursor.render(0)
+    buffer[9, 9] = Segment("X")
+
+    assert cursor.render(1)[9, 9] is None
+    assert anim.frames[0].buffer[1, 0] is None
+
+
+def test_lazy_source():
+    pulled = []
+
+    def source():
+        for text in "ABC":
+            pulled.append(text)
+            yield keyframe(text)
+
+    anim = Animation(source=source())
+    assert anim.frames == []
+    assert not anim.loaded
+
+    assert anim.render(0.5)[0, 0].text == "A"
+    assert pulled == ["A", "B"]
+
+    assert anim.render(1.5)[0, 0].text == "B"
+    assert pulled == ["A", "B", "C"]
+    assert not anim.loaded
+
+    assert anim.render(10)[0, 0].text == "C"
+    assert anim.loaded
+
+
+def test_load_all():
+    anim = Animation(source=(keyframe(text) for text in "ABC"))
+    anim.load()
+
+    assert anim.loaded
+    assert len(anim.frames) == 3
@@ -1,9 +1,15 @@
+import pickle
+
 import pytest
 from rich.segment import Segment
 
 from ansi_stdio.buffer.buffer import Buffer
+from ansi_stdio.buffer.dense import DenseBuffer
 from ansi_stdio.core.box import Box
 
+BUFFER_TYPES = [Buffer, DenseBuffer]
+OTHER_TYPE = {Buffer: DenseBuffer, DenseBuffer: Buffer}
+
 
 def test_create_buffer():
     buffer = Buffer()
@@ -115,6 +121,24 @@ def test_crop_iand_inplace():
     assert len(buf) == 1
 
 
+def test_crop_iand_trims_rows():
+    buf = Buffer()
+    buf[0, 0] = Segment("ABCDEF")
+    buf[2, 1] = Segment("G")
+    copy = buf.copy()
+
+    buf &= Box(1, 0, 3, 2)
+    assert [(x, y, seg.text) for x, y, seg in sorted(buf.cells())] == [
+        (1, 0, "B"),
+        (2, 0, "C"),
+        (2, 1, "G"),
+    ]
+    assert len(buf) == 3
+    assert buf.box == Box(1, 0, 3, 2)
+    assert len(copy) == 7
+    assert copy[5, 0].text == "F"
+
+
 def test_copy_isolated():
     buf = Buffer()
     buf[0, 0] = Segment("Z")
@@ -251,3 +275,246 @@ def test_buffer_isub_removes_empty_rows():
     a -= b
     assert 1 not in a._data
     assert len(a) == 0
+
+
+def test_buffer_isub_shrinks_box():
+    a = Buffer()
+    b = Buffer()
+    a[0, 0] = Segment("AB")
+    a[5, 3] = Segment("C")
+    b[5, 3] = Segment("C")
+
+    a -= b
+    assert a.box == Box(0, 0, 2, 1)
+
+    a[4, 2] = Segment("D")
+    assert a.box == Box(0, 0, 5, 3)
+    assert len(a) == 3
+
+
+def test_writes_leave_stale_box_for_later():
+    a = Buffer()
+    a[0, 0] = Segment("AB")
+    a[5, 3] = Segment("C")
+    a &= Box(0, 0, 2, 1)
+
+    a[4, 2] = Segment("D")
+    a.fill(Box(1, 5, 2, 6), "E")
+    a.blit(a.copy(), 1, 0)
+    assert a._box is None
+    assert a.box == Box(0, 0, 6, 6)
+
+
+def test_buffer_cells_share_style_ids():
+    buf = Buffer()
+    buf[0, 0] = Segment("AB", style="bold")
+
+    assert buf._data[0][0] >> 21 == buf._data[0][1] >> 21
+    assert buf[1, 0] == Segment("B", "bold")
+
+
+def test_buffer_sub_style_difference():
+    a = Buffer()
+    b = Buffer()
+    a[0, 0] = Segment("A", style="bold")
+    b[0, 0] = Segment("A")
+
+    diff = a - b
+    assert diff[0, 0] == Segment("A", "bold")
+    assert len(diff) == 1
+
+
+def test_buffer_sub_dense_buffer():
+    a = Buffer()
+    b = DenseBuffer()
+    a[0, 0] = Segment("AB", style="bold")
+    b[0, 0] = Segment("A", style="bold")
+
+    diff = a - b
+    assert diff[0, 0] is None
+    assert diff[1, 0].text == "B"
+
+
+def test_copy_keeps_size():
+    buf = Buffer()
+    buf[0, 0] = Segment("ABC")
+
+    assert len(buf.copy()) == 3
+
+
+def test_copy_shares_rows_until_written():
+    buf = Buffer()
+    buf[0, 0] = Segment("A")
+    buf[0, 1] = Segment("B")
+
+    c = buf.copy()
+    assert c._data[0] is buf._data[0]
+
+    c[1, 0] = Segment("C")
+    assert c._data[0] is not buf._data[0]
+    assert c._data[1] is buf._data[1]
+    assert buf[1, 0] is None
+
+
+def test_copy_original_write_does_not_leak():
+    buf = Buffer()
+    buf[0, 0] = Segment("A")
+
+    c = buf.copy()
+    buf[0, 0] = Segment("Z")
+    buf -= Buffer()
+
+    assert c[0, 0].text == "A"
+    assert buf[0, 0].text == "Z"
+
+
+def test_copy_isub_does_not_leak():
+    buf = Buffer()
+    buf[0, 0] = Segment("AB")
+    c = buf.copy()
+
+    other = Buffer()
+    other[0, 0] = Segment("A")
+    c -= other
+
+    assert buf[0, 0].text == "A"
+    assert c[0, 0] is None
+
+
+def test_pickle_round_trip():
+    buf = Buffer()
+    buf[0, 0] = Segment("ab", style="bold")
+    buf[3, 2] = Segment("c")
+
+    state = buf.__getstate__()
+    assert state["styles"] == ["bold", None]
+
+    copy = pickle.loads(pickle.dumps(buf))
+    assert copy[0, 0] == Segment("a", "bold")
+    assert copy[3, 2] == Segment("c")
+    assert len(copy) == 3
+    assert copy.box == buf.box
+
+
+def test_setitem_bumps_version_once():
+    buf = Buffer()
+    buf[0, 0] = Segment("A")
+    assert buf.version == 1
+
+
+def test_not_threadsafe_buffer():
+    buf = Buffer(threadsafe=False)
+    with buf.batch():
+        buf[0, 0] = Segment("AB")
+        buf.set_row(0, 1, "CD")
+    assert buf.version == 1
+    assert len(buf) == 4
+    assert not buf.copy().threadsafe
+    assert not (buf & Box(0, 0, 1, 1)).threadsafe
+    assert not (buf - Buffer()).threadsafe
+    assert not pickle.loads(pickle.dumps(buf)).threadsafe
+
+
+@pytest.mark.parametrize("cls", BUFFER_TYPES)
+def test_delitem(cls):
+    buf = cls()
+    buf[0, 0] = Segment("AB")
+    buf[0, 1] = Segment("C")
+    copy = buf.copy()
+
+    del buf[1, 0]
+    del buf[0, 1]
+    del buf[5, 5]
+    assert buf[1, 0] is None
+    assert 1 not in buf._data
+    assert len(buf) == 1
+    assert buf.box == Box(0, 0, 1, 1)
+    assert copy[1, 0].text == "B"
+    assert len(copy) == 3
+
+
+@pytest.mark.parametrize("cls", BUFFER_TYPES)
+def test_set_row(cls):
+    buf = cls()
+    buf.set_row(2, 1, "abc", "bold")
+    buf.set_row(3, 1, "XY")
+
+    assert buf[2, 1] == Segment("a", "bold")
+    assert buf[3, 1] == Segment("X")
+    assert buf[4, 1] == Segment("Y")
+    assert len(buf) == 3
+    assert buf.box == Box(2, 1, 5, 2)
+
+
+@pytest.mark.parametrize("cls", BUFFER_TYPES)
+def test_blit_offset(cls):
+    src = cls()
+    src[0, 0] = Segment("ab", style="red")
+    src[1, 1] = Segment("c")
+
+    buf = cls()
+    buf[5, 3] = Segment("Z")
+    buf.blit(src, 4, 2)
+
+    assert buf[4, 2] == Segment("a", "red")
+    assert buf[5, 2] == Segment("b", "red")
+    assert buf[5, 3] == Segment("c")
+    assert len(buf) == 3
+    assert buf.box == Box(4, 2, 6, 4)
+    assert src[0, 0] == Segment("a", "red")
+
+
+@pytest.mark.parametrize("cls", BUFFER_TYPES)
+def test_blit_other_buffer_type(cls):
+    src = OTHER_TYPE[cls]()
+    src[0, 0] = Segment("hi")
+
+    buf = cls()
+    buf.blit(src, -1, 1)
+    assert buf[-1, 1].text == "h"
+    assert buf[0, 1].text == "i"
+    assert len(buf) == 2
+
+
+@pytest.mark.parametrize("cls", BUFFER_TYPES)
+def test_blit_onto_itself(cls):
+    buf = cls()
+    buf[0, 0] = Segment("AB")
+    buf[0, 1] = Segment("C")
+
+    buf.blit(buf, 0, 1)
+    buf.blit(buf, 1, 0)
+    assert [(x, y, seg.text) for x, y, seg in sorted(buf.cells())] == [
+        (0, 0, "A"),
+        (0, 1, "A"),
+        (0, 2, "C"),
+        (1, 0, "A"),
+        (1, 1, "A"),
+        (1, 2, "C"),
+        (2, 0, "B"),
+        (2, 1, "B"),
+    ]
+    assert len(buf) == 8
+    assert buf.box == Box(0, 0, 3, 3)
+
+
+@pytest.mark.parametrize("cls", BUFFER_TYPES)
+def test_fill(cls):
+    buf = cls()
+    buf[1, 1] = Segment("x")
+    buf.fill(Box(0, 0, 3, 2), ".", "dim")
+
+    assert buf[1, 1] == Segment(".", "dim")
+    assert buf[2, 0] == Segment(".", "dim")
+    assert buf[3, 0] is None
+    assert len(buf) == 6
+    assert buf.box == Box(0, 0, 3, 2)
+
+
+@pytest.mark.parametrize("cls", BUFFER_TYPES)
+def test_fill_empty_box(cls):
+    buf = cls()
+    buf.fill(Box(0, 0, 0, 5))
+
+    assert len(buf) == 0
+    assert not buf.box
@@ -0,0 +1,144 @@
+import pytest
+from rich.segment import Segment
+from rich.style import Style
+
+from ansi_stdio.buffer.animation import Animation
+from ansi_stdio.buffer.buffer import Buffer
+from ansi_stdio.buffer.container import (
+    AnimationFile,
+    AnimationWriter,
+    open_animation,
+    save,
+)
+from ansi_stdio.buffer.dense import DenseBuffer
+from ansi_stdio.buffer.frame import DeltaFrame, KeyFrame
+
+
+def frame(frame_type, buffer_type, *cells, duration=1.0):
+    buffer = buffer_type()
+    for x, y, text, style in cells:
+        buffer[x, y] = Segment(text, style)
+    return frame_type(buffer, duration)
+
+
+def sample():
+    anim = Animation()
+    anim.add(frame(KeyFrame, DenseBuffer, (0, 0, "hello", Style(bold=True))))
+    anim.add(frame(DeltaFrame, DenseBuffer, (1, 0, "E", "red"), (4, 2, "x", None)))
+    anim.add(frame(DeltaFrame, Buffer, (-2, 1, "ab", None), (3, 1, "c", "italic")))
+    anim.add(frame(KeyFrame, DenseBuffer, (0, 0, "bye", None), duration=0.5))
+    return anim
+
+
+def cells(buffer):
+    return sorted(
+        (x, y, segment.text, str(segment.style)) for x, y, segment in buffer.cells()
+    )
+
+
+@pytest.mark.parametrize("codec", ["none", "zlib"])
+def test_round_trip(tmp_path, codec):
+    path = tmp_path / "demo.anim"
+    anim = sample()
+    save(anim, path, codec)
+
+    loaded = open_animation(path)
+    assert len(loaded.frames) == 4
+    assert [f.time for f in loaded.frames] == [f.time for f in anim.frames]
+    for t in (0.5, 1.5, 2.5, 3.2):
+        assert cells(loaded.render(t)) == cells(anim.render(t))
+
+    assert loaded.render(0)[0, 0].style.bold
+
+
+def test_random_access(tmp_path):
+    path = tmp_path / "demo.anim"
+    save(sample(), path)
+
+    with AnimationFile(path) as file:
+        assert len(file) == 4
+        assert file.keyframes == [0, 3]
+        assert file.duration(3) == 0.5
+
+        buffer = file.buffer(2)
+        assert type(buffer) is Buffer
+        assert buffer[-2, 1].text == "a"
+        assert buffer[3, 1].style == "italic"
+        assert len(buffer) == 3
+
+        last = file.frame(3)
+        assert isinstance(last, KeyFrame)
+        assert last.buffer[2, 0].text == "e"
+
+
+def test_frames_decode_lazily(tmp_path):
+    path = tmp_path / "demo.anim"
+    save(sample(), path)
+
+    loaded = open_animation(path)
+    assert all(f._buffer is None for f in loaded.frames)
+    loaded.render(3.2)
+    assert [f._buffer is None for f in loaded.frames] == [True, True, True, False]
+
+
+def test_unclosed_file_is_readable(tmp_path):
+    path = tmp_path / "demo.anim"
+    writer = AnimationWriter(path)
+    for f in sample().frames:
+        writer.add(f)
+    writer.flush()
+
+    # Cut the last record short, as if we crashed part way through it
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+
+    with AnimationFile(path) as file:
+        assert len(file) == 3
+        assert file.buffer(1)[1, 0].style == "red"
+
+
+def test_append(tmp_path):
+    path = tmp_path / "demo.anim"
+    frames = sample().frames
+    with AnimationWriter(path) as writer:
+        writer.add(frames[0])
+        writer.add(frames[1])
+
+    with AnimationWriter(path, append=True) as writer:
+        writer.add(frames[2])
+        writer.add(frames[3])
+
+    loaded = open_animation(path)
+    assert len(loaded.frames) == 4
+    assert cells(loaded.render(2.5)) == cells(sample().render(2.5))
+
+
+def test_styles_written_once(tmp_path):
+    path = tmp_path / "demo.anim"
+    with AnimationWriter(path) as writer:
+        for _ in range(3):
+            writer.add(frame(DeltaFrame, DenseBuffer, (0, 0, "x", "blue")))
+
+    with AnimationFile(path) as file:
+        assert file.styles == ["blue"]
+
+
+def test_not_an_animation(tmp_path):
+    path = tmp_path / "other.anim"
+    path.write_bytes(b"definitely not")
+
+    with pytest.raises(ValueError):
+        AnimationFile(path)
+
+
+def test_unknown_codec(tmp_path):
+    with pytest.raises(ValueError):
+        AnimationWriter(tmp_path / "demo.anim", codec="lzma")
+
+
+def test_zstd(tmp_path):
+    pytest.importorskip("zstandard")
+    path = tmp_path / "demo.anim"
+    save(sample(), path, "zstd")
+
+    assert cells(open_animation(path).render(1.5)) == cells(sample().render(1.5))
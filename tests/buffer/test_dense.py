@@ -0,0 +1,390 @@
+import pickle
+
+import pytest
+from rich.segment import Segment
+
+from ansi_stdio.buffer.buffer import Buffer
+from ansi_stdio.buffer.dense import DenseBuffer
+from ansi_stdio.core.box import Box
+
+
+def test_get_empty():
+    buf = DenseBuffer()
+    assert buf[0, 0] is None
+
+
+def test_set_and_get_segment():
+    buf = DenseBuffer()
+    buf[0, 0] = Segment("hello", style="bold")
+
+    assert buf[0, 0] == Segment("h", "bold")
+    assert buf[4, 0] == Segment("o", "bold")
+    assert buf[5, 0] is None
+    assert buf[-1, 0] is None
+    assert len(buf) == 5
+
+
+def test_box():
+    buf = DenseBuffer()
+    buf[-1, 5] = Segment("hello")
+
+    assert buf.box == Box(-1, 5, 4, 6)
+
+
+def test_overwrite_does_not_grow_size():
+    buf = DenseBuffer()
+    buf[2, 0] = Segment("abc")
+    buf[0, 0] = Segment("XYZ")
+
+    assert len(buf) == 5
+    assert buf[0, 0].text == "X"
+    assert buf[2, 0].text == "Z"
+    assert buf[4, 0].text == "c"
+
+
+def test_row_grows_left_and_right():
+    buf = DenseBuffer()
+    buf[5, 0] = Segment("A")
+    buf[1, 0] = Segment("B")
+    buf[9, 0] = Segment("C")
+
+    assert buf[1, 0].text == "B"
+    assert buf[5, 0].text == "A"
+    assert buf[9, 0].text == "C"
+    assert buf[3, 0] is None
+    assert len(buf) == 3
+
+
+def test_iadd_merges():
+    a = DenseBuffer()
+    b = DenseBuffer()
+    a[0, 0] = Segment("XX")
+    b[1, 0] = Segment("Y", style="red")
+    b[0, 3] = Segment("Z")
+
+    a += b
+    assert a[0, 0].text == "X"
+    assert a[1, 0] == Segment("Y", "red")
+    assert a[0, 3].text == "Z"
+    assert len(a) == 3
+    assert a.box == Box(0, 0, 2, 4)
+
+
+def test_iadd_skips_gaps():
+    a = DenseBuffer()
+    a[0, 0] = Segment("abc")
+    b = DenseBuffer()
+    b[0, 0] = Segment("X")
+    b[2, 0] = Segment("Z")
+
+    a += b
+    assert a[0, 0].text == "X"
+    assert a[1, 0].text == "b"
+    assert a[2, 0].text == "Z"
+
+
+def test_iadd_sparse_buffer():
+    a = DenseBuffer()
+    b = Buffer()
+    b[3, 3] = Segment("Q")
+
+    a += b
+    assert a[3, 3].text == "Q"
+    assert len(a) == 1
+
+
+def test_sparse_iadd_dense_buffer():
+    a = Buffer()
+    b = DenseBuffer()
+    b[3, 3] = Segment("Q")
+
+    a += b
+    assert a[3, 3].text == "Q"
+    assert len(a) == 1
+
+
+def test_iadd_type_error():
+    buf = DenseBuffer()
+
+    with pytest.raises(TypeError):
+        buf += "not a buffer"
+
+
+def test_add_returns_dense_copy():
+    a = DenseBuffer()
+    b = DenseBuffer()
+    a[0, 0] = Segment("X")
+    b[1, 0] = Segment("Y")
+
+    c = a + b
+    assert isinstance(c, DenseBuffer)
+    assert len(c) == 2
+    assert len(a) == 1
+
+
+def test_crop_and():
+    buf = DenseBuffer()
+    buf[0, 1] = Segment("ABCD")
+    buf[5, 5] = Segment("B")
+
+    cropped = buf & Box(1, 0, 3, 3)
+    assert cropped[0, 1] is None
+    assert cropped[1, 1].text == "B"
+    assert cropped[2, 1].text == "C"
+    assert cropped[5, 5] is None
+    assert len(cropped) == 2
+    assert cropped.box == Box(1, 1, 3, 2)
+
+
+def test_crop_iand_inplace():
+    buf = DenseBuffer()
+    buf[1, 1] = Segment("A")
+    buf[5, 5] = Segment("B")
+
+    buf &= Box(0, 0, 3, 3)
+    assert buf[1, 1].text == "A"
+    assert buf[5, 5] is None
+    assert len(buf) == 1
+
+
+def test_crop_iand_trims_rows():
+    buf = DenseBuffer()
+    buf[0, 0] = Segment("ABCDEF")
+    buf[0, 1] = Segment("GH")
+    buf[4, 2] = Segment("I")
+    copy = buf.copy()
+
+    buf &= Box(1, 0, 4, 3)
+    assert buf._data[0].start == 1
+    assert len(buf._data[0]) == 3
+    assert buf[1, 0].text == "B"
+    assert buf[0, 0] is None
+    assert 2 not in buf._data
+    assert len(buf) == 4
+    assert buf.box == Box(1, 0, 4, 2)
+    assert len(copy) == 9
+    assert copy[5, 0].text == "F"
+
+
+def test_copy_isolated():
+    buf = DenseBuffer()
+    buf[0, 0] = Segment("Z")
+
+    c = buf.copy()
+    c[0, 0] = Segment("Q")
+
+    assert buf[0, 0].text == "Z"
+    assert c[0, 0].text == "Q"
+    assert len(c) == 1
+
+
+def test_sub_diff():
+    a = DenseBuffer()
+    b = DenseBuffer()
+    a[0, 1] = Segment("ABC")
+    a[0, 2] = Segment("same")
+    b[0, 1] = Segment("AXC")
+    b[0, 2] = Segment("same")
+
+    diff = a - b
+    assert diff[0, 1] is None
+    assert diff[1, 1].text == "B"
+    assert diff[2, 1] is None
+    assert diff[0, 2] is None
+    assert len(diff) == 1
+
+
+def test_sub_style_difference():
+    a = DenseBuffer()
+    b = DenseBuffer()
+    a[0, 0] = Segment("A", style="bold")
+    b[0, 0] = Segment("A")
+
+    diff = a - b
+    assert diff[0, 0] == Segment("A", "bold")
+
+
+def test_sub_missing_row():
+    a = DenseBuffer()
+    a[0, 0] = Segment("A")
+
+    diff = a - DenseBuffer()
+    assert diff[0, 0].text == "A"
+    assert len(diff) == 1
+
+
+def test_sub_sparse_buffer():
+    a = DenseBuffer()
+    b = Buffer()
+    a[0, 0] = Segment("AB")
+    b[0, 0] = Segment("A")
+
+    diff = a - b
+    assert diff[0, 0] is None
+    assert diff[1, 0].text == "B"
+
+
+def test_isub_in_place_removal():
+    a = DenseBuffer()
+    b = DenseBuffer()
+    a[1, 1] = Segment("AB")
+    a[0, 2] = Segment("C")
+    b[1, 1] = Segment("A")
+    b[0, 2] = Segment("C")
+
+    a -= b
+    assert a[1, 1] is None
+    assert a[2, 1].text == "B"
+    assert 2 not in a._data
+    assert len(a) == 1
+    assert a.box == Box(2, 1, 3, 2)
+
+
+def test_isub_then_write_tracks_size_and_box():
+    a = DenseBuffer()
+    b = DenseBuffer()
+    a[0, 0] = Segment("ABC")
+    a[0, 4] = Segment("D")
+    b[0, 0] = Segment("AB")
+    b[0, 4] = Segment("D")
+
+    a -= b
+    assert len(a) == 1
+    assert a.box == Box(2, 0, 3, 1)
+
+    a[1, 3] = Segment("\u0100")
+    assert len(a) == 2
+    assert a.box == Box(1, 0, 3, 4)
+    a.recalculate()
+    assert len(a) == 2
+    assert a.box == Box(1, 0, 3, 4)
+
+
+def test_crop_iand_size():
+    buf = DenseBuffer()
+    buf[0, 0] = Segment("ABCD")
+    buf[0, 1] = Segment("EF")
+    buf &= Box(1, 0, 3, 2)
+    assert len(buf) == 3
+    assert buf.box == Box(1, 0, 3, 2)
+
+
+def test_results_keep_threadsafe():
+    buf = DenseBuffer(threadsafe=False)
+    buf[0, 0] = Segment("AB")
+    assert not (buf & Box(0, 0, 1, 1)).threadsafe
+    assert not (buf - DenseBuffer()).threadsafe
+    assert not (buf - Buffer()).threadsafe
+    assert (DenseBuffer() - buf).threadsafe
+
+
+def test_cells():
+    buf = DenseBuffer()
+    buf[0, 0] = Segment("A")
+    buf[2, 0] = Segment("B")
+
+    assert list(buf.cells()) == [
+        (0, 0, Segment("A")),
+        (2, 0, Segment("B")),
+    ]
+
+
+def test_styles_are_interned():
+    buf = DenseBuffer()
+    buf[0, 0] = Segment("AAAA", style="bold")
+    buf[0, 1] = Segment("BBBB", style="bold")
+
+    assert buf._data[0].styles == buf._data[1].styles
+
+
+def test_copy_shares_rows_until_written():
+    buf = DenseBuffer()
+    buf[0, 0] = Segment("AB")
+    buf[0, 1] = Segment("CD")
+
+    c = buf.copy()
+    assert isinstance(c, DenseBuffer)
+    assert c._data[0] is buf._data[0]
+
+    buf[1, 0] = Segment("X")
+    assert c[1, 0].text == "B"
+    assert c._data[1] is buf._data[1]
+
+    c += buf
+    assert c[1, 0].text == "X"
+
+
+def test_copy_isub_does_not_leak():
+    buf = DenseBuffer()
+    buf[0, 0] = Segment("AB")
+    c = buf.copy()
+
+    other = DenseBuffer()
+    other[0, 0] = Segment("A")
+    c -= other
+
+    assert buf[0, 0].text == "A"
+    assert c[0, 0] is None
+    assert c[1, 0].text == "B"
+
+
+def test_pickle_round_trip():
+    buf = DenseBuffer()
+    buf[1, 0] = Segment("ab", style="italic")
+    buf[5, 0] = Segment("c")
+
+    copy = pickle.loads(pickle.dumps(buf))
+    assert isinstance(copy, DenseBuffer)
+    assert copy[1, 0] == Segment("a", "italic")
+    assert copy[3, 0] is None
+    assert copy[5, 0] == Segment("c")
+    assert len(copy) == 3
+    assert copy.box == buf.box
+
+
+def test_changed_masks():
+    a = DenseBuffer()
+    b = DenseBuffer()
+    a[0, 0] = Segment("abcd")
+    b[0, 0] = Segment("aXcY")
+    a[0, 1] = Segment("same")
+    b[0, 1] = Segment("same")
+    a[2, 2] = Segment("xy")
+    b[0, 2] = Segment("..xZ")
+    a[0, 3] = Segment("new")
+
+    changed = a.changed(b)
+    assert sorted(changed) == [0, 2, 3]
+    assert [bool(flag) for flag in changed[0]] == [False, True, False, True]
+    assert [bool(flag) for flag in changed[2]] == [False, True]
+    assert [bool(flag) for flag in changed[3]] == [True, True, True]
+
+
+def test_changed_ignores_gaps():
+    a = DenseBuffer()
+    b = DenseBuffer()
+    a[0, 0] = Segment("a")
+    a[2, 0] = Segment("c")
+    b[0, 0] = Segment("abc")
+
+    assert a.changed(b) == {}
+    assert len(a - b) == 0
+
+
+def test_sub_screen_sized():
+    a = DenseBuffer()
+    for y in range(24):
+        a[0, y] = Segment("x" * 80)
+    b = a.copy()
+    b[5, 3] = Segment("Q", style="bold")
+    b[79, 23] = Segment("Z")
+
+    diff = b - a
+    assert list(diff.cells()) == [
+        (5, 3, Segment("Q", "bold")),
+        (79, 23, Segment("Z")),
+    ]
+
+    b -= a
+    assert list(b.cells()) == list(diff.cells())
+    assert b.box == diff.box
@@ -0,0 +1,31 @@
+from rich.style import Style
+
+from ansi_stdio.buffer.styles import StyleTable, styles
+
+
+def test_none_is_zero():
+    table = StyleTable()
+    assert table.intern(None) == 0
+    assert table[0] is None
+    assert len(table) == 1
+
+
+def test_intern_is_stable():
+    table = StyleTable()
+    bold = table.intern(Style(bold=True))
+    red = table.intern(Style(color="red"))
+
+    assert bold != red
+    assert table.intern(Style(bold=True)) == bold
+    assert table[bold] == Style(bold=True)
+    assert len(table) == 3
+
+
+def test_string_styles():
+    table = StyleTable()
+    style_id = table.intern("bold")
+    assert table[style_id] == "bold"
+
+
+def test_shared_table():
+    assert styles.intern(Style(italic=True)) == styles.intern(Style(italic=True))
@@ -0,0 +1,74 @@
+from ansi_stdio.core.cache import Cache
+
+
+def test_get_missing():
+    cache = Cache()
+    assert cache.get("a") is None
+    assert cache.get("a", 1) == 1
+    assert cache.misses == 2
+    assert cache.hits == 0
+
+
+def test_put_and_get():
+    cache = Cache()
+    cache.put("a", "xyz")
+
+    assert "a" in cache
+    assert cache.get("a") == "xyz"
+    assert cache.hits == 1
+    assert cache.size == 3
+    assert len(cache) == 1
+
+
+def test_evicts_least_recently_used():
+    cache = Cache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.evictions == 1
+
+
+def test_evicts_by_size():
+    cache = Cache(max_entries=0, max_size=5)
+    cache.put("a", "12")
+    cache.put("b", "34")
+    cache.put("c", "56")
+
+    assert "a" not in cache
+    assert cache.size == 4
+    assert cache.evictions == 1
+
+
+def test_too_big_is_not_stored():
+    cache = Cache(max_size=2)
+    cache.put("a", "123")
+
+    assert "a" not in cache
+    assert cache.size == 0
+
+
+def test_replace_updates_size():
+    cache = Cache()
+    cache.put("a", "123")
+    cache.put("a", "1")
+
+    assert cache.size == 1
+    assert len(cache) == 1
+
+
+def test_discard_and_clear():
+    cache = Cache()
+    cache.put("a", "123")
+    cache.put("b", "45")
+    cache.discard("a")
+    cache.discard("missing")
+    assert cache.size == 2
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
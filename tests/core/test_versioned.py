@@ -59,3 +59,53 @@ def test_mixed_changes_and_waits():
     assert d.version == 0
     d.mutate()
     assert d.version == 1
+
+
+def test_not_threadsafe_is_plain_counter():
+    class Demo(Versioned):
+        @changes
+        def mutate(self):
+            return "mutate"
+
+        @waits
+        def readonly(self):
+            return "readonly"
+
+    d = Demo(threadsafe=False)
+    assert not d.threadsafe
+    assert d.mutate() == "mutate"
+    assert d.readonly() == "readonly"
+    d.change()
+    assert d.version == 2
+    with d._lock:  # still usable as a context manager
+        pass
+
+
+def test_batch_bumps_version_once():
+    class Demo(Versioned):
+        @changes
+        def mutate(self):
+            pass
+
+    for threadsafe in (True, False):
+        d = Demo(threadsafe=threadsafe)
+        with d.batch():
+            d.mutate()
+            d.mutate()
+            d.change()
+            with d.batch():
+                d.mutate()
+            assert d.version == 0
+        assert d.version == 1
+
+
+def test_batch_bumps_version_on_error():
+    v = Versioned()
+    try:
+        with v.batch():
+            raise ValueError
+    except ValueError:
+        pass
+    assert v.version == 1
+    v.change()
+    assert v.version == 2
@@ -0,0 +1,92 @@
+import pytest
+
+from ansi_stdio.loader import ansi, load
+
+
+def text(buffer, y, width):
+    return "".join(buffer[x, y].text if buffer[x, y] else " " for x in range(width))
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return path
+
+
+def test_rejects_other_suffixes(tmp_path):
+    path = write(tmp_path / "demo.cast", b"hi")
+
+    with pytest.raises(ValueError):
+        ansi.load(path)
+
+
+def test_single_frame(tmp_path):
+    path = write(tmp_path / "art.ans", b"\x1b[1mhi\x1b[0m\r\nthere")
+    anim = ansi.load(path)
+
+    assert len(anim.frames) == 1
+    buffer = anim.render(0)
+    assert text(buffer, 0, 5) == "hi   "
+    assert buffer[0, 0].style.bold
+    assert text(buffer, 1, 5) == "there"
+
+
+def test_frames_split_at_clear_screen(tmp_path):
+    path = write(tmp_path / "dump.log", b"one\x1b[H\x1b[2Jtwo\x1bcthree")
+    file = ansi.AnsiFile(path)
+
+    assert file.offsets == [0, 3, 13]
+    assert text(file.buffer(1), 0, 3) == "two"
+    assert text(file.buffer(2), 0, 5) == "three"
+    assert text(file.buffer(0), 0, 3) == "one"
+
+
+def test_frames_parse_lazily(tmp_path):
+    path = write(tmp_path / "dump.log", b"A\x1b[2JB\x1b[2JC")
+    anim = ansi.load(path)
+
+    assert [frame._buffer for frame in anim.frames] == [None, None, None]
+    assert anim.render(0.25)[0, 0].text == "C"
+    assert anim.frames[0]._buffer is None
+
+
+def test_stops_at_sauce_record(tmp_path):
+    path = write(tmp_path / "art.ans", b"art\x1aSAUCE00junk")
+    anim = ansi.load(path)
+
+    assert text(anim.render(0), 0, 8) == "art     "
+
+
+def test_code_page_437(tmp_path):
+    path = write(tmp_path / "art.ans", b"\xb0\xdb")
+    buffer = ansi.AnsiFile(path).buffer(0)
+
+    assert text(buffer, 0, 2) == "░█"
+
+
+def test_code_page_437_bare_newlines(tmp_path):
+    path = write(tmp_path / "art.ans", b"AB\nCD\xb0\n")
+    buffer = ansi.AnsiFile(path).buffer(0)
+
+    assert text(buffer, 0, 3) == "AB "
+    assert text(buffer, 1, 3) == "CD░"
+
+
+def test_tall_frame(tmp_path):
+    path = write(tmp_path / "art.txt", b"\n".join(b"line %d" % i for i in range(40)))
+    buffer = ansi.AnsiFile(path).buffer(0)
+
+    assert text(buffer, 0, 6) == "line 0"
+    assert text(buffer, 39, 7) == "line 39"
+
+
+def test_empty_file(tmp_path):
+    path = write(tmp_path / "empty.ans", b"")
+    anim = ansi.load(path)
+
+    assert len(anim.frames) == 1
+    assert text(anim.render(0), 0, 2) == "  "
+
+
+def test_registered_loader(tmp_path):
+    path = write(tmp_path / "art.ans", b"ok")
+    assert text(load(path).render(0), 0, 2) == "ok"
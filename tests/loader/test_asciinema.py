@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from ansi_stdio.buffer.frame import DeltaFrame, KeyFrame
+from ansi_stdio.loader import asciinema, load
+
+
+def write_cast(path, events, **header):
+    header = {"version": 2, "width": 10, "height": 3, **header}
+    lines = [json.dumps(header)] + [json.dumps(event) for event in events]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def text(buffer, y, width):
+    return "".join(buffer[x, y].text if buffer[x, y] else " " for x in range(width))
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("hello\n")
+
+    with pytest.raises(ValueError):
+        asciinema.load(path)
+
+
+def test_frames(tmp_path):
+    path = write_cast(
+        tmp_path / "demo.cast",
+        [[0.5, "o", "hi"], [1.0, "i", "x"], [1.5, "o", " there"]],
+    )
+    anim = asciinema.load(path)
+
+    assert len(anim.render(0.2)) == 0
+    assert text(anim.render(0.7), 0, 8) == "hi      "
+    assert text(anim.render(2.0), 0, 8) == "hi there"
+
+    frames = anim.frames
+    assert isinstance(frames[0], KeyFrame)
+    assert all(isinstance(frame, DeltaFrame) for frame in frames[1:])
+    assert [frame.time for frame in frames] == [0.0, 0.5, 1.5]
+
+
+def test_loads_lazily(tmp_path):
+    path = write_cast(
+        tmp_path / "demo.cast",
+        [[float(i), "o", str(i)] for i in range(1, 10)],
+    )
+    anim = asciinema.load(path)
+    assert anim.frames == []
+
+    anim.render(2.5)
+    assert len(anim.frames) < 10
+    assert not anim.loaded
+
+    anim.render(100)
+    assert anim.loaded
+    assert len(anim.frames) == 10
+
+
+def test_idle_time_limit(tmp_path):
+    path = write_cast(
+        tmp_path / "demo.cast",
+        [[1.0, "o", "a"], [60.0, "o", "b"]],
+        idle_time_limit=2,
+    )
+    anim = asciinema.load(path)
+    anim.load()
+
+    assert [frame.time for frame in anim.frames] == [0.0, 1.0, 3.0]
+
+
+def test_resize(tmp_path):
+    path = write_cast(
+        tmp_path / "demo.cast",
+        [[0.1, "o", "ab"], [0.2, "r", "20x5"], [0.3, "o", "\x1b[5;1Hz"]],
+    )
+    anim = asciinema.load(path)
+
+    buffer = anim.render(1)
+    assert buffer[0, 4].text == "z"
+    assert buffer[0, 0].text == "a"
+
+
+def test_truncated_last_line(tmp_path):
+    path = write_cast(tmp_path / "demo.cast", [[0.1, "o", "ok"]])
+    with open(path, "a") as file:
+        file.write('[0.2, "o", "cut')
+
+    anim = asciinema.load(path)
+    assert text(anim.render(1), 0, 2) == "ok"
+
+
+def test_registered_loader(tmp_path):
+    path = write_cast(tmp_path / "demo.cast", [[0.1, "o", "ok"]])
+
+    anim = load(path)
+    assert text(anim.render(1), 0, 2) == "ok"
+
+
+def test_registered_ahead_of_ansi(tmp_path):
+    path = write_cast(tmp_path / "demo", [[0.1, "o", "ok"]])
+
+    anim = load(path)
+    assert text(anim.render(1), 0, 3) == "ok "
@@ -0,0 +1,99 @@
+import json
+import os
+
+from ansi_stdio.buffer.frame import DeltaFrame, KeyFrame
+from ansi_stdio.loader import asciinema, cache, load
+
+
+def write_cast(path, events):
+    header = {"version": 2, "width": 10, "height": 3}
+    lines = [json.dumps(header)] + [json.dumps(event) for event in events]
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+def text(buffer, y, width):
+    return "".join(buffer[x, y].text if buffer[x, y] else " " for x in range(width))
+
+
+def test_cache_dir(cache_home):
+    assert cache.cache_dir() == cache_home / "ansi_stdio"
+
+
+def test_entry_changes_with_file(tmp_path):
+    path = write_cast(tmp_path / "demo.cast", [[0.1, "o", "a"]])
+    before = cache.entry(path)
+    assert cache.entry(path) == before
+
+    write_cast(path, [[0.1, "o", "ab"]])
+    assert cache.entry(path) != before
+
+    os.utime(path, ns=(0, 0))
+    assert cache.entry(path) != before
+
+
+def test_write_removes_older_entries(tmp_path):
+    path = write_cast(tmp_path / "demo.cast", [[0.1, "o", "a"]])
+    other = write_cast(tmp_path / "other.cast", [[0.1, "o", "b"]])
+    cache.write(cache.entry(path), asciinema.load(path))
+    cache.write(cache.entry(other), asciinema.load(other))
+
+    write_cast(path, [[0.1, "o", "ab"]])
+    cache.write(cache.entry(path), asciinema.load(path))
+
+    entries = sorted(cache.cache_dir().glob("*.anim"))
+    assert entries == sorted([cache.entry(path), cache.entry(other)])
+
+
+def test_round_trip(tmp_path):
+    path = write_cast(
+        tmp_path / "demo.cast", [[0.5, "o", "\x1b[1mhi"], [1.0, "o", "!"]]
+    )
+    cache_file = cache.entry(path)
+
+    cache.write(cache_file, asciinema.load(path))
+    anim = cache.read(cache_file)
+
+    assert isinstance(anim.frames[0], KeyFrame)
+    assert all(isinstance(frame, DeltaFrame) for frame in anim.frames[1:])
+    assert [frame.time for frame in anim.frames] == [0.0, 0.5, 1.0]
+    buffer = anim.render(2)
+    assert text(buffer, 0, 3) == "hi!"
+    assert buffer[0, 0].style.bold
+
+
+def test_read_missing_or_corrupt(tmp_path):
+    assert cache.read(tmp_path / "missing.anim") is None
+
+    corrupt = tmp_path / "corrupt.anim"
+    corrupt.write_bytes(b"nonsense")
+    assert cache.read(corrupt) is None
+
+
+def test_load_uses_cache(tmp_path, monkeypatch):
+    path = write_cast(tmp_path / "demo.cast", [[0.1, "o", "ok"]])
+    cache_file = cache.entry(path)
+
+    anim = load(path)
+    assert not cache_file.exists()
+    anim.render(10)
+    assert cache_file.exists()
+
+    monkeypatch.setattr(asciinema, "_frames", None)  # would break a real load
+    assert text(load(path).render(10), 0, 2) == "ok"
+
+
+def test_edited_file_is_reloaded(tmp_path):
+    path = write_cast(tmp_path / "demo.cast", [[0.1, "o", "old"]])
+    load(path).load()
+
+    write_cast(path, [[0.1, "o", "new!"]])
+    assert text(load(path).render(10), 0, 4) == "new!"
+
+
+def test_ansi_files_are_not_cached(tmp_path, cache_home):
+    path = tmp_path / "art.ans"
+    path.write_bytes(b"art")
+
+    assert text(load(path).render(0), 0, 3) == "art"
+    assert not cache_home.exists()
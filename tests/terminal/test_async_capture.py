@@ -0,0 +1,93 @@
+import asyncio
+
+from ansi_stdio.terminal.async_capture import AsyncCapture
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 10))
+
+
+def test_wait():
+    screen = run(AsyncCapture("echo hello", width=20, height=4).wait())
+    assert screen.display[0].rstrip() == "hello"
+
+
+def test_iterate_updates():
+    async def collect():
+        lines = []
+        capture = AsyncCapture("sh -c 'echo one; sleep 0.1; echo two'", 20, 4)
+        async for screen in capture:
+            lines.append(screen.display[1].rstrip())
+        return lines
+
+    lines = run(collect())
+    assert lines
+    assert lines[-1] == "two"
+
+
+def test_many_at_once():
+    async def many():
+        captures = [AsyncCapture(f"echo {i}", width=10, height=2) for i in range(20)]
+        return await asyncio.gather(*(c.wait() for c in captures))
+
+    screens = run(many())
+    assert [s.display[0].rstrip() for s in screens] == [str(i) for i in range(20)]
+
+
+def test_close_stops_program():
+    async def closed():
+        async with AsyncCapture("sleep 10", width=10, height=2) as capture:
+            pass
+        return capture
+
+    capture = run(closed())
+    assert capture.done
+
+
+def test_break_stops_program():
+    async def broken():
+        capture = AsyncCapture("sh -c 'echo go; sleep 10'", width=10, height=2)
+        async for _ in capture:
+            break
+        for _ in range(50):
+            await asyncio.sleep(0.05)
+            if capture.process.returncode is not None:
+                break
+        return capture
+
+    capture = run(broken())
+    assert capture.done
+    assert capture.process.returncode is not None
+    assert capture._exited_fd is None
+
+
+def test_close_without_pidfd_reaps(monkeypatch):
+    monkeypatch.setattr(
+        "ansi_stdio.terminal.async_capture.exit_fd", lambda process: None
+    )
+
+    async def closed():
+        async with AsyncCapture("sleep 10", width=10, height=2) as capture:
+            pass
+        for _ in range(50):
+            await asyncio.sleep(0.05)
+            if capture._poller is None:
+                break
+        return capture
+
+    capture = run(closed())
+    assert capture.process.returncode is not None
+
+
+def test_without_pidfd(monkeypatch):
+    monkeypatch.setattr(
+        "ansi_stdio.terminal.async_capture.exit_fd", lambda process: None
+    )
+    screen = run(AsyncCapture("echo polled", width=20, height=4).wait())
+    assert screen.display[0].rstrip() == "polled"
+
+
+def test_utf8_split_across_reads():
+    script = "import os, time; os.write(1, b'\\\\xe6\\\\xbc'); time.sleep(0.1); os.write(1, b'\\\\xa2!')"
+    screen = run(AsyncCapture(f'python3 -c "{script}"', width=20, height=4).wait())
+    assert screen.display[0].rstrip() == "漢!"
@@ -0,0 +1,107 @@
+import os
+import time
+
+from ansi_stdio.terminal import capture
+from ansi_stdio.terminal.capture import PtyReader, capture_terminal
+
+
+def line(screen, y):
+    return screen.display[y].rstrip()
+
+
+def test_capture_output():
+    screen = capture_terminal("echo hello", width=20, height=4)
+    assert line(screen, 0) == "hello"
+
+
+def test_capture_calls_back():
+    calls = []
+    capture_terminal(
+        "printf 'a\\nb\\n'", width=20, height=4, display_callback=calls.append
+    )
+    assert calls
+
+
+def test_capture_quoted_arguments():
+    screen = capture_terminal("printf '%s' 'one two'", width=20, height=4)
+    assert line(screen, 0) == "one two"
+
+
+def test_capture_waits_for_late_output():
+    start = time.monotonic()
+    screen = capture_terminal("sh -c 'sleep 0.2; echo late'", width=20, height=4)
+    assert line(screen, 0) == "late"
+    assert time.monotonic() - start >= 0.2
+
+
+def test_capture_missing_program(capsys):
+    capture_terminal("definitely-not-a-real-program", width=20, height=4)
+    assert "Error running program" in capsys.readouterr().out
+
+
+def test_capture_without_pidfd(monkeypatch):
+    monkeypatch.setattr(capture, "exit_fd", lambda process: None)
+    screen = capture_terminal("echo polled", width=20, height=4)
+    assert line(screen, 0) == "polled"
+
+
+def nonblocking_pipe():
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(read_fd, False)
+    return read_fd, write_fd
+
+
+def test_reader_drains_everything():
+    read_fd, write_fd = nonblocking_pipe()
+    os.write(write_fd, b"x" * 10000)
+
+    reader = PtyReader(read_fd, size=1024, max_size=65536)
+    assert reader.drain() == b"x" * 10000
+    assert reader.size > 1024
+    assert reader.drain() == b""
+    assert not reader.closed
+
+    os.close(write_fd)
+    assert reader.drain() == b""
+    assert reader.closed
+    os.close(read_fd)
+
+
+def test_reader_shrinks_when_quiet():
+    read_fd, write_fd = nonblocking_pipe()
+    reader = PtyReader(read_fd, size=1024)
+    reader.size = 8192
+
+    os.write(write_fd, b"x")
+    assert reader.drain() == b"x"
+    assert reader.size == 4096
+
+    os.close(write_fd)
+    os.close(read_fd)
+
+
+def test_reader_caps_one_drain():
+    read_fd, write_fd = nonblocking_pipe()
+    os.write(write_fd, b"x" * 5000)
+
+    reader = PtyReader(read_fd, size=1024, max_size=2048)
+    assert len(reader.drain()) == 3072
+    assert len(reader.drain()) == 1928
+
+    os.close(write_fd)
+    os.close(read_fd)
+
+
+def test_callback_once_per_batch():
+    calls = []
+    screen = capture_terminal(
+        "sh -c 'seq 1 2000'", width=20, height=4, display_callback=calls.append
+    )
+    assert screen.display[2].rstrip() == "2000"
+    assert len(calls) < 2000
+
+
+def test_utf8_split_across_reads():
+    script = "import os, time; os.write(1, b'\\\\xe6\\\\xbc'); time.sleep(0.1); os.write(1, b'\\\\xa2!')"
+    screen = capture_terminal(f'python3 -c "{script}"', width=20, height=4)
+    assert line(screen, 0) == "漢!"
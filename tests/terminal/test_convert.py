@@ -0,0 +1,101 @@
+import pyte
+from rich.color import Color
+
+from ansi_stdio.buffer.buffer import Buffer
+from ansi_stdio.buffer.dense import DenseBuffer
+from ansi_stdio.terminal.convert import attribute_style, screen_to_buffer
+
+
+def make_screen(width=10, height=3):
+    screen = pyte.Screen(width, height)
+    return screen, pyte.Stream(screen)
+
+
+def text(buffer, y, width):
+    return "".join(buffer[x, y].text for x in range(width))
+
+
+def test_attribute_style():
+    assert attribute_style(("default", "default") + (False,) * 6) is None
+
+    style = attribute_style(("red", "ff8700", True, False, False, False, False, False))
+    assert style.color.number == 1
+    assert style.bgcolor == Color.parse("#ff8700")
+    assert style.bold
+
+
+def test_attribute_style_is_shared():
+    attributes = ("green", "default", False, True, False, False, False, False)
+    assert attribute_style(attributes) is attribute_style(tuple(attributes))
+
+
+def test_whole_screen():
+    screen, stream = make_screen(4, 2)
+    stream.feed("ab\x1b[1mc\x1b[0m")
+
+    buffer = screen_to_buffer(screen)
+    assert isinstance(buffer, DenseBuffer)
+    assert len(buffer) == 8
+    assert text(buffer, 0, 4) == "abc "
+    assert buffer[1, 0].style is None
+    assert buffer[2, 0].style.bold
+    assert text(buffer, 1, 4) == "    "
+    assert not screen.dirty
+
+
+def test_dirty_only_updates_buffer():
+    screen, stream = make_screen(4, 2)
+    stream.feed("ab\r\ncd")
+    buffer = screen_to_buffer(screen)
+
+    stream.feed("\x1b[1;1Hxy")
+    screen.buffer[1][0] = screen.buffer[1][0]._replace(data="Q")  # not dirty
+    screen_to_buffer(screen, buffer, dirty_only=True)
+
+    assert text(buffer, 0, 4) == "xy  "
+    assert buffer[0, 1].text == "c"
+
+
+def test_sparse_buffer():
+    screen, stream = make_screen(3, 1)
+    stream.feed("abc")
+
+    buffer = screen_to_buffer(screen, Buffer())
+    assert text(buffer, 0, 3) == "abc"
+
+
+def test_wide_characters():
+    screen, stream = make_screen(4, 1)
+    stream.feed("漢a")
+
+    buffer = screen_to_buffer(screen)
+    assert buffer[0, 0].text == "漢"
+    assert buffer[1, 0] is None
+    assert buffer[2, 0].text == "a"
+
+
+def test_wide_and_combining_in_one_run():
+    screen, stream = make_screen(5, 1)
+    stream.feed("漢x\u0301Z")
+
+    buffer = screen_to_buffer(screen)
+    assert [buffer[x, 0] and buffer[x, 0].text for x in range(4)] == [
+        "漢",
+        None,
+        "x",
+        "Z",
+    ]
+
+
+def test_dirty_only_wide_character_clears_right_half():
+    screen, stream = make_screen(4, 1)
+    stream.feed("abc")
+    buffer = screen_to_buffer(screen)
+
+    stream.feed("\x1b[1;1H中")
+    screen_to_buffer(screen, buffer, dirty_only=True)
+
+    fresh = screen_to_buffer(screen)
+    assert list(buffer.cells()) == list(fresh.cells())
+    assert buffer[1, 0] is None
+    assert len(buffer) == len(fresh)
@@ -0,0 +1,144 @@
+import pyte
+
+from ansi_stdio.buffer.container import AnimationWriter, open_animation
+from ansi_stdio.buffer.frame import DeltaFrame, KeyFrame
+from ansi_stdio.core.clock import Clock
+from ansi_stdio.terminal.record import Recorder, record_terminal
+
+
+def paused_clock():
+    clock = Clock()
+    clock.pause()
+    clock.time = 0.0
+    return clock
+
+
+def make_screen(width=10, height=3):
+    screen = pyte.Screen(width, height)
+    return screen, pyte.Stream(screen)
+
+
+def test_first_frame_is_keyframe():
+    screen, stream = make_screen()
+    stream.feed("hi")
+
+    recorder = Recorder(clock=paused_clock())
+    frame = recorder.record(screen)
+
+    assert isinstance(frame, KeyFrame)
+    assert frame.buffer[0, 0].text == "h"
+    assert frame.buffer[1, 0].text == "i"
+    assert len(frame.buffer) == 2
+    assert not screen.dirty
+
+
+def test_delta_holds_only_changes():
+    screen, stream = make_screen()
+    stream.feed("hello")
+    recorder = Recorder(clock=paused_clock())
+    recorder.record(screen)
+
+    stream.feed("\rj")
+    frame = recorder.record(screen)
+
+    assert isinstance(frame, DeltaFrame)
+    assert frame.buffer[0, 0].text == "j"
+    assert len(frame.buffer) == 1
+
+
+def test_erased_cells_are_recorded():
+    screen, stream = make_screen()
+    stream.feed("abc")
+    recorder = Recorder(clock=paused_clock())
+    recorder.record(screen)
+
+    stream.feed("\x1b[2K")
+    frame = recorder.record(screen)
+    assert len(frame.buffer) == 3
+    assert frame.buffer[1, 0].text == " "
+
+
+def test_wide_character_blanks_what_it_covers():
+    screen, stream = make_screen()
+    stream.feed("abc")
+    recorder = Recorder(clock=paused_clock())
+    recorder.record(screen)
+
+    stream.feed("\x1b[1;1H中")
+    frame = recorder.record(screen)
+    assert frame.buffer[0, 0].text == "中"
+    assert frame.buffer[1, 0].text == " "
+
+    replayed = recorder.animation.render(0)
+    assert replayed[0, 0].text == "中"
+    assert replayed[1, 0].text == " "
+    assert replayed[2, 0].text == "c"
+
+
+def test_no_change_no_frame():
+    screen, stream = make_screen()
+    stream.feed("abc")
+    recorder = Recorder(clock=paused_clock())
+    recorder.record(screen)
+
+    stream.feed("\rabc")
+    assert recorder.record(screen) is None
+    assert len(recorder.animation.frames) == 1
+
+
+def test_frame_times_follow_clock():
+    clock = paused_clock()
+    screen, stream = make_screen()
+    recorder = Recorder(clock=clock)
+
+    stream.feed("A")
+    recorder.record(screen)
+    clock.time = 0.5
+    stream.feed("B")
+    recorder.record(screen)
+    clock.time = 2.0
+    recorder.finish()
+
+    anim = recorder.animation
+    assert [frame.time for frame in anim.frames] == [0.0, 0.5]
+    assert anim.frames[-1].duration == 1.5
+    assert anim.render(0.2)[1, 0] is None
+    assert anim.render(0.7)[1, 0].text == "B"
+
+
+def test_resize_records_keyframe():
+    screen, stream = make_screen()
+    stream.feed("abc")
+    recorder = Recorder(clock=paused_clock())
+    recorder.record(screen)
+
+    screen.resize(4, 20)
+    frame = recorder.record(screen)
+    assert isinstance(frame, KeyFrame)
+
+
+def test_record_terminal():
+    anim = record_terminal("echo hello", width=20, height=4)
+    buffer = anim.render(anim.frames[-1].time)
+    text = "".join(buffer[x, 0].text for x in range(5))
+    assert text == "hello"
+
+
+def test_streams_to_writer(tmp_path):
+    clock = paused_clock()
+    path = tmp_path / "session.anim"
+    screen, stream = make_screen()
+
+    with AnimationWriter(path) as writer:
+        recorder = Recorder(clock=clock, writer=writer)
+        stream.feed("A")
+        recorder.record(screen)
+        clock.time = 0.5
+        stream.feed("B")
+        recorder.record(screen)
+        clock.time = 2.0
+        recorder.finish()
+
+    anim = open_animation(path)
+    assert [frame.duration for frame in anim.frames] == [0.5, 1.5]
+    assert anim.render(1)[1, 0].text == "B"
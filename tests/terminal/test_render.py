@@ -0,0 +1,94 @@
+import pyte
+
+from ansi_stdio.terminal.render import (
+    COLORS_16,
+    COLORS_256,
+    color_code,
+    format_char,
+    format_line,
+    nearest_16,
+    nearest_256,
+    style_codes,
+)
+
+
+def screen_row(text, columns=10):
+    screen = pyte.Screen(columns, 1)
+    pyte.Stream(screen).feed(text)
+    return screen.buffer[0]
+
+
+def test_style_codes():
+    row = screen_row("\033[1;31mA")
+    assert style_codes(row[0]) == "1;31"
+    assert style_codes(row[1]) == ""
+
+
+def test_format_char():
+    row = screen_row("\033[4mA\033[0mB")
+    assert format_char(row[0]) == "\033[4mA\033[0m"
+    assert format_char(row[1]) == "B"
+
+
+def test_format_line_plain():
+    assert format_line(screen_row("hello"), 7) == "hello  "
+
+
+def test_format_line_groups_runs():
+    row = screen_row("\033[31mred\033[32mgreen\033[0m!")
+    assert format_line(row, 9) == "\033[31mred\033[0m\033[32mgreen\033[0m!"
+
+
+def test_format_line_empty_cells():
+    assert format_line({}, 3) == "   "
+
+
+def test_format_line_wide_characters():
+    assert format_line(screen_row("漢x"), 4) == "漢x "
+
+
+def test_format_line_overwritten_wide_character():
+    assert format_line(screen_row("中ab\x1b[1;1Hx"), 10) == "x ab      "
+
+
+def test_named_colors():
+    assert color_code("red") == "31"
+    assert color_code("brown") == "33"
+    assert color_code("brightbrown", background=True) == "103"
+    assert color_code("nonsense") == "39"
+
+
+def test_truecolor():
+    row = screen_row("\033[38;2;1;2;3mA\033[0;48;2;255;135;0mB")
+    assert style_codes(row[0]) == "38;2;1;2;3"
+    assert style_codes(row[1]) == "48;2;255;135;0"
+
+
+def test_256_colors_round_trip():
+    row = screen_row("\033[38;5;208mA\033[38;5;9mB")
+    assert style_codes(row[0], COLORS_256) == "38;5;208"
+    assert style_codes(row[1], COLORS_256) == "91"
+
+
+def test_truecolor_to_256():
+    assert color_code("ff8800", colors=COLORS_256) == "38;5;208"
+    assert color_code("808080", colors=COLORS_256) == "38;5;244"
+
+
+def test_reduce_to_16():
+    assert color_code("ff0000", colors=COLORS_16) == "91"
+    assert color_code("110000", background=True, colors=COLORS_16) == "40"
+    assert color_code(208, colors=COLORS_16) == "33"
+
+
+def test_palette_indexes():
+    assert color_code(1) == "31"
+    assert color_code(12) == "94"
+    assert color_code(100, background=True) == "48;5;100"
+
+
+def test_nearest():
+    assert nearest_256((0, 0, 0)) == 0
+    assert nearest_256((255, 135, 0)) == 208
+    assert nearest_256((9, 9, 9)) == 232
+    assert nearest_16((250, 250, 250)) == 15
@@ -0,0 +1,103 @@
+import io
+
+import pyte
+
+from ansi_stdio.terminal.writer import ScreenWriter
+
+
+def make_screen(text, columns=10, lines=3):
+    screen = pyte.Screen(columns, lines)
+    stream = pyte.Stream(screen)
+    stream.feed(text)
+    return screen, stream
+
+
+def test_first_write_paints_everything():
+    screen, _ = make_screen("hi")
+    out = io.StringIO()
+    ScreenWriter(out).write(screen)
+
+    text = out.getvalue()
+    assert text.startswith("\033[0m\033[H\033[2J")
+    assert "hi" in text
+
+
+def test_nothing_changed_writes_nothing():
+    screen, _ = make_screen("hi")
+    out = io.StringIO()
+    writer = ScreenWriter(out)
+    writer.write(screen)
+    out.truncate(0)
+    out.seek(0)
+
+    writer.write(screen)
+    assert out.getvalue() == ""
+
+
+def test_only_changed_cells_are_sent():
+    screen, stream = make_screen("hello")
+    writer = ScreenWriter(io.StringIO())
+    writer.render(screen)
+
+    stream.feed("\033[1;2HE")
+    output = writer.render(screen)
+    assert output.startswith("\033[1;2HE")
+    assert "llo" not in output
+
+
+def test_runs_share_one_sgr():
+    screen, _ = make_screen("\033[31mred\033[0m")
+    output = ScreenWriter(io.StringIO()).render(screen)
+
+    assert output.count("\033[0;31m") == 1
+    assert "\033[0;31mred\033[0m" in output
+
+
+def test_forward_move_within_row():
+    screen, stream = make_screen("abcdef")
+    writer = ScreenWriter(io.StringIO())
+    writer.render(screen)
+
+    stream.feed("\033[1;1HA\033[1;5HE")
+    output = writer.render(screen)
+    assert output.startswith("\033[1;1HA\033[3CE")
+
+
+def test_dirty_only_skips_clean_lines():
+    screen, stream = make_screen("top\r\nbottom")
+    writer = ScreenWriter(io.StringIO())
+    writer.render(screen)
+
+    stream.feed("\033[2;1HB")
+    screen.buffer[0][0] = screen.buffer[0][0]._replace(data="X")
+    output = writer.render(screen, dirty_only=True)
+    assert "B" in output
+    assert "X" not in output
+
+
+def test_wide_characters():
+    screen, stream = make_screen("漢x")
+    writer = ScreenWriter(io.StringIO())
+    output = writer.render(screen)
+    assert "漢x" in output
+
+
+def cells(screen):
+    return [
+        [screen.buffer[y][x].data or " " for x in range(screen.columns)]
+        for y in range(screen.lines)
+    ]
+
+
+def test_round_trip_overwritten_wide_characters():
+    screen, stream = make_screen("漢xyz\r\n漢abc")
+    copy, copy_stream = make_screen("")
+    writer = ScreenWriter(io.StringIO())
+    copy_stream.feed(writer.render(screen))
+    assert cells(copy) == cells(screen)
+
+    # Narrow over the left half of one, and over the right half of the other
+    stream.feed("\x1b[Ha\x1b[1;3HQ\x1b[2;2HR\x1b[2;4HS")
+    copy_stream.feed(writer.render(screen))
+    assert cells(copy) == cells(screen)
+    assert cells(copy)[0][:5] == ["a", " ", "Q", "y", "z"]